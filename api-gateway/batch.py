@@ -0,0 +1,88 @@
+"""Run gateway sub-requests in-process for POST /batch.
+
+Sub-requests are sent straight to the router, below the middleware
+stack: the batch request was authenticated once by AuthMiddleware and
+each sub-request inherits its request.state (user, role). Route
+handlers, dependencies (e.g. require_admin) and exception handlers
+run as usual, so a sub-request behaves like the same call made on its
+own. Rate limits still apply: each sub-request takes a token from its
+route's bucket, as the same call made directly would, and gets a 429
+entry when the bucket is empty. The rest of the per-request middleware
+work is skipped.
+"""
+import asyncio
+import json
+import math
+
+from middleware import route_template
+
+# Copied from the batch request into every sub-request scope
+_INHERITED_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "scheme", "server", "client", "root_path", "app",
+    "starlette.exception_handlers",  # set by ExceptionMiddleware; makes HTTPException -> JSON work
+)
+
+
+async def run_subrequest(router, parent_scope: dict, method: str, path: str, body=None, limiter=None) -> dict:
+    path, _, query = path.partition("?")
+    payload = b"" if body is None else json.dumps(body).encode()
+    headers = [(k, v) for k, v in parent_scope["headers"] if k not in (b"content-length", b"content-type")]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+
+    scope = {key: parent_scope[key] for key in _INHERITED_SCOPE_KEYS if key in parent_scope}
+    scope.update({
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "state": dict(parent_scope.get("state", {})),
+    })
+
+    if limiter is not None:
+        wait = await limiter.take(scope, route_template(router.routes, scope))
+        if wait > 0:
+            return {"status": 429, "body": {"detail": "Too many requests", "retry_after": math.ceil(wait)}}
+
+    sent_body = False
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.Event().wait()  # nothing more to read; never disconnects
+
+    status, content_type, chunks = 500, "", []
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"").decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await router(scope, receive, send)
+
+    raw = b"".join(chunks)
+    if content_type.startswith("application/json") and raw:
+        return {"status": status, "body": json.loads(raw)}
+    return {"status": status, "body": raw.decode(errors="replace") if raw else None}
+
+
+async def run_batch(router, parent_scope: dict, subrequests, max_concurrency: int, limiter=None) -> list[dict]:
+    """Run every sub-request concurrently (at most `max_concurrency` at once).
+
+    A failing sub-request yields its own error entry; it never fails the batch.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(sub):
+        async with semaphore:
+            try:
+                result = await run_subrequest(router, parent_scope, sub.method, sub.path, sub.body, limiter)
+            except Exception as exc:
+                result = {"status": 500, "body": {"detail": f"{type(exc).__name__}: {exc}"}}
+        return {"id": sub.id, **result}
+
+    return await asyncio.gather(*(run_one(sub) for sub in subrequests))
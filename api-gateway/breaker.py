@@ -0,0 +1,80 @@
+import time
+
+from prometheus_client import Counter, Gauge
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = Gauge("gateway_upstream_circuit_state", "Circuit state per upstream (0=closed, 1=half-open, 2=open)", ["upstream"])
+CIRCUIT_TRANSITIONS = Counter("gateway_upstream_circuit_transitions_total", "Circuit breaker state changes", ["upstream", "state"])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} circuit is open")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream.
+
+    closed    -> calls go through; `failure_threshold` failures in a row open it
+    open      -> calls fail fast with CircuitOpenError for `reset_timeout` seconds
+    half_open -> up to `half_open_max_calls` trial calls; a success closes the
+                 circuit, a failure opens it again
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 half_open_max_calls: int = 1, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_calls = 0
+        CIRCUIT_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        self.trial_calls = 0
+        if state == OPEN:
+            self.opened_at = self.clock()
+        if state == CLOSED:
+            self.failures = 0
+        CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+
+    def before_call(self):
+        """Reserve a call slot or raise CircuitOpenError."""
+        if self.state == OPEN:
+            remaining = self.opened_at + self.reset_timeout - self.clock()
+            if remaining > 0:
+                raise CircuitOpenError(self.name, remaining)
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.trial_calls >= self.half_open_max_calls:
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self.trial_calls += 1
+
+    def cancel_call(self):
+        """Give back a slot taken by before_call() when the call ended without a verdict."""
+        if self.state == HALF_OPEN and self.trial_calls:
+            self.trial_calls -= 1
+
+    def record_success(self):
+        self.failures = 0
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._transition(OPEN)
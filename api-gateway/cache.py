@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+CACHE_HITS = Counter("gateway_cache_hits_total", "Gateway cache hits", ["cache"])
+CACHE_MISSES = Counter("gateway_cache_misses_total", "Gateway cache misses", ["cache"])
+CACHE_EVICTIONS = Counter("gateway_cache_evictions_total", "Gateway cache evictions", ["cache", "reason"])
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a TTL.
+
+    Only used from the event loop, so there is no locking. `clock` is
+    injectable so tests can move time forward.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, clock=time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self.generation = 0  # bumped by invalidate(); lets slow writers detect they raced one
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            CACHE_MISSES.labels(self.name).inc()
+            return default
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            CACHE_EVICTIONS.labels(self.name, "expired").inc()
+            CACHE_MISSES.labels(self.name).inc()
+            return default
+        self._entries.move_to_end(key)
+        CACHE_HITS.labels(self.name).inc()
+        return value
+
+    def get_stale(self, key):
+        """Return (value, fresh) and keep an expired entry instead of dropping it.
+
+        Lets a caller revalidate what it already holds (e.g. with
+        If-None-Match) rather than refetch it; (None, False) if absent.
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            CACHE_MISSES.labels(self.name).inc()
+            return None, False
+        expires_at, value = entry
+        self._entries.move_to_end(key)
+        if expires_at <= self.clock():
+            CACHE_MISSES.labels(self.name).inc()
+            return value, False
+        CACHE_HITS.labels(self.name).inc()
+        return value, True
+
+    def set(self, key, value, ttl: float | None = None):
+        """Store `value`; `ttl` overrides the cache-wide TTL for this entry."""
+        if self.max_entries <= 0:
+            return
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.labels(self.name, "size").inc()
+
+    def invalidate(self, key=_MISSING):
+        """Drop one key, or every entry when called without a key."""
+        self.generation += 1
+        if key is _MISSING:
+            dropped = len(self._entries)
+            self._entries.clear()
+        else:
+            dropped = 1 if self._entries.pop(key, _MISSING) is not _MISSING else 0
+        if dropped:
+            CACHE_EVICTIONS.labels(self.name, "invalidated").inc(dropped)
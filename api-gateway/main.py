@@ -1,97 +1,84 @@
+import hashlib
 import httpx
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
-from jose import jwt, JWTError
-from pydantic import BaseModel, confloat, conint, Field
-from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
-from requests import Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Depends, Path, Query
+from fastapi.responses import JSONResponse, Response
+from jose import jwt
+from typing import Any, Literal
+
+from pydantic import BaseModel, confloat, conint, conlist, Field
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
 
+from batch import run_batch
+from breaker import CircuitOpenError
+from cache import TTLCache
+from middleware import AuthMiddleware, LoggingMiddleware, MetricsMiddleware
+from ratelimit import InMemoryRateLimitStore, RateLimit, RateLimiter, RateLimitMiddleware, parse_route_limits
+from tracing import REQUEST_ID_HEADER, TracingMiddleware, install_log_record_factory
+from upstream import UpstreamConfig, UpstreamRegistry, passthrough
+
 ## JWT
 JWT_SECRET = os.getenv("JWT_SECRET", "CHANGE_ME")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
 ## Status
+## endpoint is the route template (/orders/{order_id}), never the raw path
 REQUEST_COUNT = Counter("gateway_requests_total", "Total HTTP requests", ["method", "endpoint", "http_status"])
+REQUEST_LATENCY = Histogram("gateway_request_duration_seconds", "Gateway request latency", ["method", "endpoint"])
 
 # set up logging
 logger = logging.getLogger("api-gateway")
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s")
+install_log_record_factory()
+
+## Upstream connection pools, one per service (limits/timeouts via env, see upstream.py)
+upstreams = UpstreamRegistry()
+catalog_client = upstreams.register(UpstreamConfig.from_env("catalog"))
+order_client = upstreams.register(UpstreamConfig.from_env("order"))
+auth_client = upstreams.register(UpstreamConfig.from_env("auth"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstreams.start()
+    yield
+    await upstreams.close()
 
 app = FastAPI(
     title = "OverclocKart API Gateway",
     description="Route requests to the appropriate service + Auth",
-    version="0.3.0", ## 0.1.0 was the first version, 0.2.0 JWT was added, 0.3.0 CORS middleware is added
+    version="0.5.0", ## 0.1.0 was the first version, 0.2.0 JWT was added, 0.3.0 CORS middleware is added, 0.4.0 pooled upstream clients, 0.5.0 pure-ASGI middleware
+    lifespan=lifespan,
 )
 
-# cors middleware
-app.add_middleware(
-    CORSMiddleware, 
-    allow_origins=["http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"], # allow GET, POST, OPTIONS etc.
-    allow_headers=["*"], # allow Content-Type, Authorization, etc.
-)
+## Verified-claims cache: a token is checked once, then served from memory until its exp
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", 10000))
+jwt_cache = TTLCache("jwt", max_entries=JWT_CACHE_MAX_ENTRIES, ttl=0)
+
+def verify_token(token: str) -> dict:
+    # keyed by digest so raw bearer tokens are never held as cache keys
+    key = hashlib.sha256(token.encode()).digest()
+    payload = jwt_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])  # raises JWTError
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            jwt_cache.set(key, payload, ttl=ttl)
+    return payload
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # if request.method == "OPTIONS":
-        #     return await call_next(request)
-        logger.info(f"-> {request.method} {request.url.path}")
-        response = await call_next(request)
-        logger.info(f"<- {request.method} {request.url.path} {response.status_code}")
-        return response
-
-# Middleware 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if request.method == "OPTIONS":
-            return await call_next(request)
-
-        public_paths = {
-            "/health",
-            "/docs", "openapi.json",
-            "/auth/register", "/auth/login" ## added for auth service
-        } 
-       
-        # Allow unauthenticated GET /products (browse catalog)
-        if request.url.path.startswith("/products") and request.method == "GET":
-            response = await call_next(request)
-            return response    
-    
-        if request.url.path in public_paths:
-            response = await call_next(request)
-            return response
-
-        # Expect a bearer token in the Authorization header
-        auth_header = request.headers.get("authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(401, "Missing Bearer token")
-    
-        token = auth_header.split(" ", 1)[1]
-
-        # verify signature and expiration
-        try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-            print(payload)
-        except JWTError:
-            raise HTTPException(401, "Invalid or expired token")
-    
-        # Attach user and role to request state for downstreram handling
-        request.state.user = payload["sub"]
-        request.state.role = payload["role"]
-        return await call_next(request)
-    
 ##  Model for proxy calls
 class UserIn(BaseModel):
     username: str
     password: str
 
+class RefreshIn(BaseModel):
+    refresh_token: str
+
 ## Models for validating the request body
 class ProductBase(BaseModel):
     name: str
@@ -103,10 +90,40 @@ class ProductCreate(ProductBase):
 class ProductOut(ProductBase):
     id: int
 
+class ProductLookupOut(BaseModel):
+    products: list[ProductOut]
+    missing: list[int]
+
 class Order(BaseModel):
     product_id: conint(gt=0)
     quantity: conint(gt=0)
 
+## POST /orders/bulk
+ORDER_BULK_MAX_ITEMS = int(os.getenv("ORDER_BULK_MAX_ITEMS", 100))
+
+class BulkOrderIn(BaseModel):
+    items: conlist(Order, min_length=1, max_length=ORDER_BULK_MAX_ITEMS)
+
+class BulkOrderResult(BaseModel):
+    status: int
+    body: Any
+
+class BulkOrderOut(BaseModel):
+    results: list[BulkOrderResult]
+
+## POST /batch
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", 20))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+
+class SubRequest(BaseModel):
+    id: str | None = None  # echoed back so clients can match results
+    method: Literal["GET", "POST"] = "GET"
+    path: str = Field(pattern="^/")
+    body: Any = None
+
+class BatchIn(BaseModel):
+    requests: conlist(SubRequest, min_length=1, max_length=BATCH_MAX_REQUESTS)
+
 ## service urls
 CATALOG_HOST = os.getenv("CATALOG_HOST", "catalog-service")
 CATALOG_PORT = os.getenv("CATALOG_PORT", "5001")
@@ -115,18 +132,60 @@ ORDER_PORT   = os.getenv("ORDER_PORT",   "5002")
 AUTH_HOST    = os.getenv("AUTH_HOST",    "auth-service")
 AUTH_PORT    = os.getenv("AUTH_PORT",    "5003")
 
+## Proxied reads stream upstream bytes straight to the client (no parse, no re-validation).
+## Handlers named here (e.g. VALIDATE_ROUTES=list_products,list_orders) instead parse the
+## upstream JSON and validate it against their response_model.
+VALIDATE_ROUTES = {r.strip() for r in os.getenv("VALIDATE_ROUTES", "").split(",") if r.strip()}
+
 # service urls
 CATALOG_URL = f"http://{CATALOG_HOST}:{CATALOG_PORT}/catalog"
 ORDER_LIST_URL   = f"http://{ORDER_HOST}:{ORDER_PORT}/orders"
+ORDER_BULK_URL   = f"http://{ORDER_HOST}:{ORDER_PORT}/orders/bulk"
 ORDER_DETAIL_URL = f"http://{ORDER_HOST}:{ORDER_PORT}/order"
 AUTH_URL = f"http://{AUTH_HOST}:{AUTH_PORT}"
 
-# Async HTTP client
-client = httpx.AsyncClient()
+## Catalog listing cache, dropped whenever a product is created through the gateway
+PRODUCTS_CACHE_TTL = float(os.getenv("PRODUCTS_CACHE_TTL", 30))
+PRODUCTS_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCTS_CACHE_MAX_ENTRIES", 128))
+products_cache = TTLCache("products", max_entries=PRODUCTS_CACHE_MAX_ENTRIES, ttl=PRODUCTS_CACHE_TTL)
+
+## Middleware pipeline (pure ASGI, see middleware.py). add_middleware wraps, so the
+## last one added runs first: CORS -> tracing -> metrics -> logging -> auth -> rate limit -> routes
+PUBLIC_PATHS = {
+    "/health", "/metrics",
+    "/docs", "/openapi.json",
+    "/auth/register", "/auth/login", ## added for auth service
+    "/auth/refresh", "/auth/logout",  # the access token may already have expired
+}
+PUBLIC_GET_PREFIXES = ("/products",) # browse catalog without logging in
+
+## Rate limits: "METHOD /route/template=rate:burst" per route, RATE_LIMIT_DEFAULT for the rest.
+## Buckets are per user (per client IP on public routes); swap the store to share them across replicas.
+RATE_LIMITS = parse_route_limits(os.getenv("RATE_LIMITS", "POST /orders=5:10, POST /orders/bulk=2:5, POST /batch=2:5"))
+RATE_LIMIT_DEFAULT = RateLimit.parse(os.getenv("RATE_LIMIT_DEFAULT", "50:100"))
+GATEWAY_MAX_IN_FLIGHT = int(os.getenv("GATEWAY_MAX_IN_FLIGHT", 1000)) # shed with 503 past this; 0 = off
+rate_limit_store = InMemoryRateLimitStore()
+rate_limiter = RateLimiter(rate_limit_store, RATE_LIMITS, RATE_LIMIT_DEFAULT)  # also applied to /batch sub-requests
 
-# Add Middleware
+app.add_middleware(
+    RateLimitMiddleware,
+    routes=app.router.routes,
+    limiter=rate_limiter,
+    exempt_paths={"/health", "/metrics"},
+    max_in_flight=GATEWAY_MAX_IN_FLIGHT,
+)
+app.add_middleware(AuthMiddleware, verify_token=verify_token, public_paths=PUBLIC_PATHS, public_get_prefixes=PUBLIC_GET_PREFIXES)
 app.add_middleware(LoggingMiddleware)
-app.add_middleware(AuthMiddleware)
+app.add_middleware(MetricsMiddleware, counter=REQUEST_COUNT, histogram=REQUEST_LATENCY, routes=app.router.routes)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(
+    CORSMiddleware, 
+    allow_origins=["http://localhost:5173"],
+    allow_credentials=True,
+    allow_methods=["*"], # allow GET, POST, OPTIONS etc.
+    allow_headers=["*"], # allow Content-Type, Authorization, etc.
+    expose_headers=["X-Next-Cursor", REQUEST_ID_HEADER, "Server-Timing"], # pagination cursor, tracing readable by the frontend
+)
 
 # Role guard
 def require_admin(request: Request):
@@ -134,16 +193,29 @@ def require_admin(request: Request):
     if request.state.role != "admin":
         raise HTTPException(status_code=403, detail="Admin privlege required")
 
-@app.middleware("http")
-async def prometheus_middleware(request: Request, call_next):
-    response = await call_next(request)
-    REQUEST_COUNT.labels(request.method, request.url.path, response.status_code).inc()
-    return response
-
 @app.get("/metrics")
 async def metrics():
+    upstreams.refresh_pool_metrics()
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
+## Upstream failures surface as gateway errors instead of 500s
+@app.exception_handler(httpx.TimeoutException)
+async def upstream_timeout_handler(request: Request, exc: httpx.TimeoutException):
+    return JSONResponse({"detail": "Upstream timed out"}, status_code=504)
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # fail fast while the upstream recovers instead of queueing more work on it
+    return JSONResponse(
+        {"detail": f"{exc.upstream} service unavailable"},
+        status_code=503,
+        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.999)))},
+    )
+
+@app.exception_handler(httpx.TransportError)
+async def upstream_error_handler(request: Request, exc: httpx.TransportError):
+    return JSONResponse({"detail": "Upstream unavailable"}, status_code=502)
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -152,19 +224,132 @@ async def health():
 @app.post("/auth/register", status_code=201)
 async def gw_register(user: UserIn):
     # Check if the user already exists        
-    resp = await(client.post(f"{AUTH_URL}/register", json=user.model_dump()))
+    resp = await(auth_client.post(f"{AUTH_URL}/register", json=user.model_dump()))
     return JSONResponse(resp.json(), status_code=resp.status_code)
 
 @app.post("/auth/login")
 async def gw_login(user: UserIn):
-    resp = await(client.post(f"{AUTH_URL}/login", json=user.model_dump()))
+    resp = await(auth_client.post(f"{AUTH_URL}/login", json=user.model_dump()))
     return JSONResponse(resp.json(), status_code=resp.status_code)
 
+## refresh: new access token (and rotated refresh token) without a password / bcrypt round
+@app.post("/auth/refresh")
+async def gw_refresh(body: RefreshIn):
+    resp = await auth_client.post(f"{AUTH_URL}/refresh", json=body.model_dump())
+    return JSONResponse(resp.json(), status_code=resp.status_code)
+
+@app.post("/auth/logout", status_code=204)
+async def gw_logout(body: RefreshIn):
+    resp = await auth_client.post(f"{AUTH_URL}/logout", json=body.model_dump())
+    if resp.status_code != 204:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    return Response(status_code=204)
+
+def retry_after(response) -> dict | None:
+    # keep an upstream's backpressure hint (e.g. order-service's full queue) for the client
+    return {"Retry-After": response.headers["retry-after"]} if "retry-after" in response.headers else None
+
+async def open_passthrough(upstream, url: str, **kwargs):
+    response = await upstream.open_stream("GET", url, **kwargs)
+    if response.status_code != 200:
+        await response.aread()
+        await response.aclose()
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+    return response
+
+## conditional GETs: catalog-service tags each /catalog page with a strong ETag
+VALIDATOR_HEADERS = ("etag", "cache-control", "x-next-cursor")
+
+def validator_headers(headers) -> dict:
+    # what a 304 carries: the validator and caching metadata, no entity headers
+    return {k: headers[k] for k in VALIDATOR_HEADERS if k in headers}
+
+def etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in {strip(tag) for tag in if_none_match.split(",")}
+
 ## routes for catalog 
 @app.get('/products', response_model=list[ProductOut])
-async def list_products():
-    response = await client.get(CATALOG_URL)
-    response.raise_for_status()
+async def list_products(
+    request: Request,
+    response: Response,
+    limit: conint(gt=0, le=1000) | None = None,
+    cursor: conint(ge=0) | None = None,
+):
+    # keyset pagination is done by catalog-service; the next page's cursor comes back in X-Next-Cursor
+    params = {k: v for k, v in {"limit": limit, "cursor": cursor}.items() if v is not None}
+    url = f"{CATALOG_URL}?{urlencode(params)}" if params else CATALOG_URL
+
+    if "list_products" not in VALIDATE_ROUTES:
+        cached, fresh = products_cache.get_stale(url)
+        if not fresh:
+            generation = products_cache.generation
+            # revalidate the expired copy we hold; holding none, pass the client's validator on
+            etag = cached.headers.get("etag") if cached else request.headers.get("if-none-match")
+            # concurrent misses share one catalog call (see Upstream.get_shared)
+            upstream = await catalog_client.get_shared(url, {"If-None-Match": etag} if etag else None)
+            if upstream.status_code == 304 and cached is None:
+                return Response(status_code=304, headers=validator_headers(upstream.headers))
+            if upstream.status_code not in (200, 304):
+                raise HTTPException(status_code=upstream.status_code, detail=upstream.text)
+            if upstream.status_code == 200:
+                cached = upstream
+            # skip if a POST /products invalidated the cache while we were fetching
+            if products_cache.generation == generation:
+                products_cache.set(url, cached)
+        if etag_matches(request.headers.get("if-none-match"), cached.headers.get("etag")):
+            return Response(status_code=304, headers=validator_headers(cached.headers))
+        return Response(cached.body, headers=cached.headers)
+
+    cached = products_cache.get(url)
+    if cached is None:
+        upstream = await catalog_client.get(url)
+        if upstream.status_code != 200:
+            raise HTTPException(status_code=upstream.status_code, detail=upstream.text)
+        cached = (upstream.json(), upstream.headers.get("X-Next-Cursor"))
+        products_cache.set(url, cached)
+    products, next_cursor = cached
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return products
+
+## search: ranked matches from catalog-service's search index, paged with limit/cursor like /products
+@app.get("/products/search", response_model=list[ProductOut])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: conint(gt=0, le=1000) | None = None,
+    cursor: conint(ge=0) | None = None,
+):
+    params = {k: v for k, v in {"q": q, "limit": limit, "cursor": cursor}.items() if v is not None}
+    url = f"{CATALOG_URL}/search?{urlencode(params)}"
+    if "search_products" not in VALIDATE_ROUTES:
+        shared = await catalog_client.get_shared(url)
+        if shared.status_code != 200:
+            raise HTTPException(status_code=shared.status_code, detail=shared.text)
+        return Response(shared.body, headers=shared.headers)
+    response = await catalog_client.get(url)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+    next_cursor = response.headers.get("X-Next-Cursor")
+    return JSONResponse(response.json(), headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+## multi-get: GET /products/lookup?ids=1,2,3 -> one catalog IN query, unknown ids under "missing"
+@app.get("/products/lookup", response_model=ProductLookupOut)
+async def lookup_products(ids: str = Query(..., pattern=r"^\d+(,\d+)*$")):
+    url = f"{CATALOG_URL}/lookup?{urlencode({'ids': ids})}"
+    if "lookup_products" not in VALIDATE_ROUTES:
+        shared = await catalog_client.get_shared(url)
+        if shared.status_code != 200:
+            raise HTTPException(status_code=shared.status_code, detail=shared.text)
+        return Response(shared.body, headers=shared.headers)
+    response = await catalog_client.get(url)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
     return response.json()
 
 ## route for product details
@@ -172,41 +357,104 @@ async def list_products():
 async def create_product(product: ProductCreate, request: Request):
     print(f"DEBUG: proxying to {CATALOG_URL}")
 
-    response = await client.post(CATALOG_URL, json=product.model_dump()) ### product.dict() is deprecated, so using model_dump()
+    response = await catalog_client.post(CATALOG_URL, json=product.model_dump()) ### product.dict() is deprecated, so using model_dump()
     if response.status_code != 201:
         raise HTTPException(status_code=response.status_code, detail=response.text)
+    products_cache.invalidate()
+    return response.json()
+
+## bulk product ingestion, body streamed to catalog-service as it arrives (NDJSON or JSON array)
+@app.post("/products/bulk", dependencies=[Depends(require_admin)])
+async def bulk_create_products(request: Request):
+    response = await catalog_client.post(
+        f"{CATALOG_URL}/bulk",
+        content=request.stream(),
+        headers={"Content-Type": request.headers.get("content-type", "application/json")},
+    )
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+    products_cache.invalidate()
     return response.json()
 
 ## routes for orders
 @app.get("/orders/{order_id}")
-async def get_order(order_id: int):
-    response = await client.get(f"{ORDER_LIST_URL}/{order_id}")
+async def get_order(order_id: int, request: Request):
+    if "get_order" not in VALIDATE_ROUTES:
+        # keyed on X-User as well, so concurrent lookups are only shared within one user;
+        # order-service only returns the order to its owner
+        shared = await order_client.get_shared(f"{ORDER_DETAIL_URL}/{order_id}", headers={"X-User": request.state.user})
+        if shared.status_code != 200:
+            raise HTTPException(status_code=shared.status_code, detail=shared.text)
+        return Response(shared.body, headers=shared.headers)
+    response = await order_client.get(f"{ORDER_DETAIL_URL}/{order_id}", headers={"X-User": request.state.user})
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+    return response.json()
+
+## an order accepted with 202 (order-service in async mode): 404 until it is written
+@app.get("/orders/tracking/{tracking_id}")
+async def get_order_by_tracking_id(request: Request, tracking_id: str = Path(pattern=r"^[0-9a-f]{32}$")):
+    response = await order_client.get(f"{ORDER_DETAIL_URL}/tracking/{tracking_id}", headers={"X-User": request.state.user})
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
     return response.json()
 
 @app.get("/orders", response_model=list[Order])
-async def list_orders(request: Request):
+async def list_orders(
+    request: Request,
+    response: Response,
+    limit: conint(gt=0, le=500) | None = None,
+    cursor: conint(gt=0) | None = None,
+):
     user = request.state.user
-    response = await client.get(
-        f"{ORDER_LIST_URL}",
+    # newest first, keyset-paginated by order-service; the next page's cursor comes back in X-Next-Cursor
+    params = {k: v for k, v in {"limit": limit, "cursor": cursor}.items() if v is not None}
+    url = f"{ORDER_LIST_URL}?{urlencode(params)}" if params else ORDER_LIST_URL
+    if "list_orders" not in VALIDATE_ROUTES:
+        return passthrough(await open_passthrough(order_client, url, headers=[("X-User", user)]))
+    upstream = await order_client.get(
+        url,
         headers=[("X-User", user)]
     )
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
+    if upstream.status_code != 200:
+        raise HTTPException(status_code=upstream.status_code, detail=upstream.text)
+    if "X-Next-Cursor" in upstream.headers:
+        response.headers["X-Next-Cursor"] = upstream.headers["X-Next-Cursor"]
+    return upstream.json()
     
 @app.post("/orders", response_model=Order, status_code=201)
 async def create_order(order: Order, request: Request):
     user = request.state.user
-    response = await client.post(
+    response = await order_client.post(
         ORDER_DETAIL_URL, 
         json=order.model_dump(),
         headers=[("X-User", user)]
         ) ### order.dict() is deprecated, so using model_dump()
+    if response.status_code == 202:
+        # order-service in ORDER_ACCEPT_MODE=async: queued, status "pending"; follow it by tracking_id
+        return JSONResponse(response.json(), status_code=202)
     if response.status_code != 201:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+        raise HTTPException(status_code=response.status_code, detail=response.text, headers=retry_after(response))
     return response.json()
 
+## bulk orders: a whole cart in one call; one catalog lookup and one commit in order-service
+@app.post("/orders/bulk", response_model=BulkOrderOut)
+async def create_orders_bulk(bulk: BulkOrderIn, request: Request):
+    response = await order_client.post(
+        ORDER_BULK_URL,
+        json=bulk.model_dump(),
+        headers=[("X-User", request.state.user)],
+    )
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text, headers=retry_after(response))
+    return response.json()
 
+## batch: several gateway calls in one round trip, authenticated once
+@app.post("/batch")
+async def batch(batch_in: BatchIn, request: Request):
+    for sub in batch_in.requests:
+        if sub.path.split("?", 1)[0].rstrip("/") == "/batch":
+            raise HTTPException(status_code=400, detail="Nested /batch requests are not allowed")
+    results = await run_batch(app.router, request.scope, batch_in.requests, BATCH_MAX_CONCURRENCY, rate_limiter)
+    return {"responses": results}
@@ -0,0 +1,162 @@
+"""Token-bucket rate limiting and load shedding for the gateway.
+
+Buckets are keyed per route and per caller: the authenticated user
+(request.state.user, set by AuthMiddleware) or the client IP on public
+routes. Bucket state lives in a RateLimitStore; the in-memory store is
+per process, and a shared store (one that several gateway replicas talk
+to) only has to implement `take`.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from prometheus_client import Counter, Gauge
+from starlette.responses import JSONResponse
+
+from middleware import route_template
+
+RATE_LIMITED = Counter("gateway_rate_limited_total", "Requests rejected with 429", ["method", "endpoint"])
+SHED_REQUESTS = Counter("gateway_shed_requests_total", "Requests rejected with 503 because the gateway was saturated")
+IN_FLIGHT = Gauge("gateway_requests_in_flight", "Requests currently being handled by the gateway")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float   # tokens added per second
+    burst: int    # bucket size
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit | None":
+        """Parse "rate:burst" ("5:10" = 5 req/s, bursts of 10); "0" or "" means no limit."""
+        spec = spec.strip()
+        if not spec or spec == "0":
+            return None
+        rate, _, burst = spec.partition(":")
+        rate = float(rate)
+        if not burst and rate == 0:
+            return None
+        burst = int(burst or max(1, math.ceil(rate)))
+        # a bucket that never refills (or never holds a token) would block its callers forever
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"rate limit {spec!r} needs a rate > 0 and a burst >= 1")
+        return cls(rate=rate, burst=burst)
+
+
+def parse_route_limits(spec: str) -> dict[tuple[str, str], RateLimit | None]:
+    """Parse "POST /orders=5:10, POST /batch=2:5" into {(method, route template): RateLimit}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, limit = item.partition("=")
+        method, _, path = route.strip().partition(" ")
+        limits[(method.upper(), path.strip())] = RateLimit.parse(limit)
+    return limits
+
+
+class RateLimitStore(Protocol):
+    async def take(self, key: str, limit: RateLimit, now: float) -> float:
+        """Take one token from `key`'s bucket.
+
+        Returns 0 when the request may proceed, otherwise the number of
+        seconds until a token will be available.
+        """
+
+
+class InMemoryRateLimitStore:
+    """Per-process buckets. The least recently used are dropped past `max_keys`
+    (a dropped bucket simply starts full again)."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def take(self, key: str, limit: RateLimit, now: float) -> float:
+        tokens, updated_at = self._buckets.pop(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated_at) * limit.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class RateLimiter:
+    """Per-route, per-caller token buckets in a RateLimitStore.
+
+    Used by RateLimitMiddleware for every request and by POST /batch for
+    each sub-request, so a batch takes the same tokens as the calls it bundles.
+    """
+
+    def __init__(self, store: RateLimitStore, route_limits: dict, default_limit: RateLimit | None,
+                 clock=time.monotonic):
+        self.store = store
+        self.route_limits = route_limits
+        self.default_limit = default_limit
+        self.clock = clock
+
+    @staticmethod
+    def caller(scope) -> str:
+        user = scope.get("state", {}).get("user")
+        if user:
+            return f"user:{user}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def take(self, scope, endpoint: str) -> float:
+        """Take a token for `scope` on route template `endpoint`; 0 or seconds until one is available."""
+        method = scope["method"]
+        limit = self.route_limits.get((method, endpoint), self.default_limit)
+        if limit is None:
+            return 0.0
+        wait = await self.store.take(f"{method} {endpoint}|{self.caller(scope)}", limit, self.clock())
+        if wait > 0:
+            RATE_LIMITED.labels(method, endpoint).inc()
+        return wait
+
+
+class RateLimitMiddleware:
+    """Shed load past `max_in_flight` with 503, then apply per-route token buckets (429).
+
+    Must run inside AuthMiddleware so request.state.user is already set.
+    """
+
+    def __init__(self, app, routes, limiter: RateLimiter, exempt_paths=(), max_in_flight: int = 0):
+        self.app = app
+        self.routes = routes
+        self.limiter = limiter
+        self.exempt_paths = set(exempt_paths)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            return await self.app(scope, receive, send)
+
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            SHED_REQUESTS.inc()
+            response = JSONResponse({"detail": "Gateway overloaded"}, 503, headers={"Retry-After": "1"})
+            return await response(scope, receive, send)
+
+        wait = await self.limiter.take(scope, route_template(self.routes, scope))
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests"}, 429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            return await response(scope, receive, send)
+
+        self.in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            IN_FLIGHT.dec()
@@ -0,0 +1,32 @@
+import asyncio
+
+from prometheus_client import Counter
+
+COALESCED_REQUESTS = Counter("gateway_upstream_coalesced_requests_total", "Requests that shared another request's in-flight upstream call", ["upstream"])
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one.
+
+    The first caller for a key starts the call; everyone arriving while
+    it is in flight awaits the same result (or exception). The call runs
+    in its own task, so a caller that disconnects does not cancel it for
+    the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def do(self, key, fn):
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            COALESCED_REQUESTS.labels(self.name).inc()
+        return await asyncio.shield(task)
@@ -0,0 +1,112 @@
+"""Request ids and Server-Timing spans for the gateway.
+
+TracingMiddleware gives every request an id: the client's X-Request-ID
+when it is well-formed, a new one otherwise. The id is kept in a
+contextvar so that log records and every upstream call (see
+Upstream._attempt) carry it. Time spent in upstream calls is recorded as
+spans. Each upstream's own Server-Timing entries are re-labelled as
+"<upstream>.<name>", so one response header shows the whole path of a
+request across services.
+"""
+import logging
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+REQUEST_ID_HEADER = "X-Request-ID"
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+spans_var: ContextVar[list | None] = ContextVar("spans", default=None)
+
+
+def current_request_id() -> str | None:
+    return request_id_var.get()
+
+
+def add_span(name: str, seconds: float):
+    # no-op outside a traced request
+    spans = spans_var.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def add_upstream_spans(upstream: str, header: str | None):
+    for name, seconds in parse_server_timing(header or ""):
+        add_span(f"{upstream}.{name}", seconds)
+
+
+def parse_server_timing(header: str) -> list[tuple[str, float]]:
+    """'db;dur=1.3;desc="x", handler;dur=4.2' -> [("db", 0.0013), ("handler", 0.0042)]"""
+    spans = []
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, *params = (param.strip() for param in entry.split(";"))
+        durations = [param[4:] for param in params if param.startswith("dur=")]
+        try:
+            spans.append((name, float(durations[0]) / 1000))
+        except (IndexError, ValueError):
+            continue
+    return spans
+
+
+def server_timing(spans) -> str:
+    """[(name, seconds)] -> 'handler;dur=4.2, catalog;dur=1.3;desc="2 calls"' (repeated names summed)."""
+    totals = {}
+    for name, seconds in spans:
+        total, calls = totals.get(name, (0.0, 0))
+        totals[name] = (total + seconds, calls + 1)
+    return ", ".join(
+        f"{name};dur={total * 1000:.1f}" + (f';desc="{calls} calls"' if calls > 1 else "")
+        for name, (total, calls) in totals.items()
+    )
+
+
+def install_log_record_factory():
+    """Give every log record a request_id ("-" outside a request) for %(request_id)s formats."""
+    make_record = logging.getLogRecordFactory()
+
+    def record_with_request_id(*args, **kwargs):
+        record = make_record(*args, **kwargs)
+        record.request_id = request_id_var.get() or getattr(record, "request_id", "-")
+        return record
+
+    logging.setLogRecordFactory(record_with_request_id)
+
+
+class TracingMiddleware:
+    """Assign the request id, and add X-Request-ID and Server-Timing to the response.
+
+    "handler" is the gateway's time to the response headers. A streamed
+    body (passthrough) is not included, because the header is sent first.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER.lower().encode(), b"").decode("latin-1")
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        spans = []
+        id_token, spans_token = request_id_var.set(request_id), spans_var.set(spans)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                timing = server_timing([("handler", time.perf_counter() - start), *spans])
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER.lower().encode(), request_id.encode()),
+                    (b"server-timing", timing.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(id_token)
+            spans_var.reset(spans_token)
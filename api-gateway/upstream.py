@@ -0,0 +1,296 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from breaker import CircuitBreaker
+from singleflight import SingleFlight
+from tracing import REQUEST_ID_HEADER, add_span, add_upstream_spans, current_request_id
+
+## Pool metrics (refreshed on every /metrics scrape)
+UPSTREAM_IN_FLIGHT = Gauge("gateway_upstream_requests_in_flight", "Requests currently waiting on an upstream", ["upstream"])
+UPSTREAM_POOL_CONNECTIONS = Gauge("gateway_upstream_pool_connections", "Open upstream connections by state", ["upstream", "state"])
+UPSTREAM_POOL_LIMIT = Gauge("gateway_upstream_pool_max_connections", "Configured upstream connection limit", ["upstream"])
+
+## Upstream call latency; status is the HTTP status or "error" when no response came back
+UPSTREAM_LATENCY = Histogram("gateway_upstream_request_duration_seconds", "Gateway -> upstream call latency", ["upstream", "method", "status"])
+UPSTREAM_RETRIES = Counter("gateway_upstream_retries_total", "Upstream calls retried after a failed attempt", ["upstream"])
+
+## Only these are retried; a retried POST could create an order twice
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+## Per-connection headers that must not be copied from an upstream response to the client
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "date", "server",
+}
+## Set by the gateway itself (TracingMiddleware); the upstream's Server-Timing is folded into the gateway's
+TRACING_HEADERS = {"x-request-id", "server-timing"}
+
+
+def _env(name: str, key: str, default, cast):
+    # per-upstream override (CATALOG_READ_TIMEOUT) -> gateway-wide default (UPSTREAM_READ_TIMEOUT) -> default
+    value = os.getenv(f"{name.upper()}_{key}", os.getenv(f"UPSTREAM_{key}"))
+    return cast(value) if value is not None else default
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    name: str
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 5.0
+    connect_timeout: float = 2.0
+    read_timeout: float = 10.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 2.0
+    max_retries: int = 2            # extra attempts for idempotent requests
+    retry_backoff: float = 0.05     # base of the jittered exponential backoff, seconds
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls, name: str) -> "UpstreamConfig":
+        return cls(
+            name=name,
+            max_connections=_env(name, "MAX_CONNECTIONS", cls.max_connections, int),
+            max_keepalive_connections=_env(name, "MAX_KEEPALIVE", cls.max_keepalive_connections, int),
+            keepalive_expiry=_env(name, "KEEPALIVE_EXPIRY", cls.keepalive_expiry, float),
+            connect_timeout=_env(name, "CONNECT_TIMEOUT", cls.connect_timeout, float),
+            read_timeout=_env(name, "READ_TIMEOUT", cls.read_timeout, float),
+            write_timeout=_env(name, "WRITE_TIMEOUT", cls.write_timeout, float),
+            pool_timeout=_env(name, "POOL_TIMEOUT", cls.pool_timeout, float),
+            max_retries=_env(name, "MAX_RETRIES", cls.max_retries, int),
+            retry_backoff=_env(name, "RETRY_BACKOFF", cls.retry_backoff, float),
+            circuit_failure_threshold=_env(name, "CIRCUIT_FAILURE_THRESHOLD", cls.circuit_failure_threshold, int),
+            circuit_reset_timeout=_env(name, "CIRCUIT_RESET_TIMEOUT", cls.circuit_reset_timeout, float),
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+
+class RawResponse(NamedTuple):
+    """A fully read upstream response: raw (still encoded) body plus forwardable headers."""
+    status_code: int
+    headers: dict
+    body: bytes
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(errors="replace")
+
+
+class Upstream:
+    """One connection pool for one downstream service.
+
+    Every service gets its own pool so a slow catalog cannot use up the
+    connections order or auth calls need. Calls go through a circuit
+    breaker, and idempotent ones are retried with jittered backoff.
+    """
+
+    def __init__(self, config: UpstreamConfig, transport: httpx.AsyncBaseTransport | None = None):
+        self.config = config
+        self.transport = transport  # tests swap in httpx.MockTransport
+        self._client: httpx.AsyncClient | None = None
+        self.flights = SingleFlight(config.name)
+        self.breaker = CircuitBreaker(
+            config.name,
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_timeout,
+        )
+        UPSTREAM_POOL_LIMIT.labels(config.name).set(config.max_connections)
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # created lazily so handlers still work when the app runs without lifespan
+        if self._client is None or self._client.is_closed:
+            transport = self.transport or httpx.AsyncHTTPTransport(limits=self.config.limits)
+            self._client = httpx.AsyncClient(transport=transport, timeout=self.config.timeout)
+        return self._client
+
+    async def start(self):
+        self.client  # opens the pool
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _attempt(self, method: str, url: str, stream: bool, **kwargs) -> httpx.Response:
+        in_flight = UPSTREAM_IN_FLIGHT.labels(self.name)
+        in_flight.inc()
+        status = "error"
+        start = time.perf_counter()
+        try:
+            request = self.client.build_request(method, url, **kwargs)
+            request_id = current_request_id()
+            if request_id:
+                request.headers[REQUEST_ID_HEADER] = request_id
+            response = await self.client.send(request, stream=stream)
+            status = str(response.status_code)
+            add_upstream_spans(self.name, response.headers.get("server-timing"))
+            return response
+        finally:
+            in_flight.dec()
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.labels(self.name, method, status).observe(elapsed)
+            add_span(self.name, elapsed)
+
+    async def _send(self, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+        attempts = 1 + (self.config.max_retries if method in IDEMPOTENT_METHODS else 0)
+        for attempt in range(attempts):
+            if attempt:
+                UPSTREAM_RETRIES.labels(self.name).inc()
+                # full jitter keeps retries from many clients from arriving in lockstep
+                await asyncio.sleep(random.uniform(0, self.config.retry_backoff * 2 ** (attempt - 1)))
+            self.breaker.before_call()  # raises CircuitOpenError -> 503
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await self._attempt(method, url, stream, **kwargs)
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+                continue
+            except BaseException:
+                self.breaker.cancel_call()
+                raise
+            if response.status_code < 500:
+                self.breaker.record_success()
+                return response
+            if is_backpressure(response):
+                # the upstream is up and deliberately refusing work (full queue, busy pool):
+                # not a failure, and opening the circuit would block its other routes too
+                self.breaker.cancel_call()
+            else:
+                self.breaker.record_failure()
+            if last_attempt or response.status_code not in RETRY_STATUSES:
+                return response
+            await response.aclose()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self._send(method, url, **kwargs)
+
+    async def open_stream(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request and return once the upstream headers arrive.
+
+        The body is left unread; the caller must `aclose()` the response
+        (passthrough() does this once the client has received it).
+        """
+        return await self._send(method, url, stream=True, **kwargs)
+
+    async def fetch_raw(self, method: str, url: str, **kwargs) -> RawResponse:
+        response = await self.open_stream(method, url, **kwargs)
+        try:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        return RawResponse(response.status_code, forwarded_headers(response), body)
+
+    async def get_shared(self, url: str, headers: dict | None = None) -> RawResponse:
+        """GET `url`, sharing the call with identical GETs already in flight.
+
+        Requests are identical when the URL and the headers the gateway
+        forwards (e.g. X-User) match, so one user never sees another's data.
+        """
+        headers = headers or {}
+        key = (url, tuple(sorted((k.lower(), v) for k, v in headers.items())))
+        return await self.flights.do(key, lambda: self.fetch_raw("GET", url, headers=headers))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def refresh_pool_metrics(self):
+        active = idle = 0
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        for conn in getattr(pool, "connections", []):
+            if conn.is_idle():
+                idle += 1
+            elif not conn.is_closed():
+                active += 1
+        UPSTREAM_POOL_CONNECTIONS.labels(self.name, "active").set(active)
+        UPSTREAM_POOL_CONNECTIONS.labels(self.name, "idle").set(idle)
+
+
+class UpstreamRegistry:
+    """Holds every upstream so the app lifespan can open and close them together."""
+
+    def __init__(self):
+        self._upstreams: dict[str, Upstream] = {}
+
+    def register(self, config: UpstreamConfig) -> Upstream:
+        upstream = Upstream(config)
+        self._upstreams[config.name] = upstream
+        return upstream
+
+    def __getitem__(self, name: str) -> Upstream:
+        return self._upstreams[name]
+
+    def __iter__(self):
+        return iter(self._upstreams.values())
+
+    async def start(self):
+        for upstream in self:
+            await upstream.start()
+
+    async def close(self):
+        for upstream in self:
+            await upstream.close()
+
+    def refresh_pool_metrics(self):
+        for upstream in self:
+            upstream.refresh_pool_metrics()
+
+
+def is_backpressure(response: httpx.Response) -> bool:
+    return response.status_code == 503 and "retry-after" in response.headers
+
+
+def forwarded_headers(response: httpx.Response) -> dict:
+    return {k: v for k, v in response.headers.items()
+            if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() not in TRACING_HEADERS}
+
+
+def passthrough(response: httpx.Response) -> StreamingResponse:
+    """Stream an open upstream response to the client byte-for-byte.
+
+    Nothing is parsed or re-serialized, so gateway memory stays flat
+    however large the body is.
+    """
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=forwarded_headers(response),
+        background=BackgroundTask(response.aclose),
+    )
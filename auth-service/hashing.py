@@ -0,0 +1,81 @@
+"""bcrypt hashing on a bounded process pool.
+
+A bcrypt hash or verify costs tens of milliseconds of pure CPU. Run on
+the request threadpool it holds the GIL, so a login storm stalls every
+other endpoint. HashPool runs it in worker processes instead (one per
+core by default) and turns requests away once `max_pending` calls are
+queued or running, rather than letting latency grow without bound.
+Callers await the result on the event loop, so a queue of pending
+hashes holds no request threads.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+HASH_PENDING = Gauge("auth_hash_pending", "bcrypt calls queued or running in the hash pool")
+HASH_LATENCY = Histogram("auth_hash_duration_seconds", "bcrypt call latency including time queued for the pool", ["op"])
+HASH_REJECTED = Counter("auth_hash_rejected_total", "bcrypt calls refused with 503 because the hash pool was full")
+
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+# Run inside the pool processes; module-level so they can be pickled by reference
+def hash_password(password: str) -> str:
+    return pwd_ctx.hash(password)
+
+
+def verify_password(password: str, pwd_hash: str) -> bool:
+    return pwd_ctx.verify(password, pwd_hash)
+
+
+class HashPoolBusy(Exception):
+    """Raised instead of queueing a bcrypt call past the pool's limit."""
+
+
+class HashPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def start(self):
+        # spawn, not fork: the server process already runs threads
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, op: str, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                HASH_REJECTED.inc()
+                raise HashPoolBusy(f"{self.pending} bcrypt calls pending")
+            self.pending += 1
+            HASH_PENDING.inc()
+        start = time.perf_counter()
+        try:
+            # the CPU work happens in a pool process; the event loop is free meanwhile
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            HASH_LATENCY.labels(op).observe(time.perf_counter() - start)
+            with self._lock:
+                self.pending -= 1
+                HASH_PENDING.dec()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, password: str, pwd_hash: str) -> bool:
+        return await self._run("verify", verify_password, password, pwd_hash)
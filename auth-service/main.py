@@ -1,24 +1,70 @@
-import os, datetime
+import os, datetime, hashlib, secrets, time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from jose import jwt, JWTError
-from passlib.context import CryptContext
+from prometheus_client import Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, Integer, String, create_engine, select
-from sqlalchemy.orm import declarative_base, Session
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, create_engine, delete, event, select, update
+from sqlalchemy.exc import IntegrityError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import declarative_base, Session, sessionmaker
+
+from hashing import HashPool, HashPoolBusy
 
 JWT_SECRET = os.getenv("JWT_SECRET", "CHANGE_ME")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKENEXPIRE_MINUTES", 60))
+# access tokens are short-lived now that clients renew them with /refresh instead of a bcrypt login
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", os.getenv("ACCESS_TOKENEXPIRE_MINUTES", 15)))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+
+## bcrypt runs in HASH_WORKERS processes; past HASH_MAX_PENDING queued + running calls -> 503
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", 4 * HASH_WORKERS))
+hash_pool = HashPool(HASH_WORKERS, HASH_MAX_PENDING)
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Database setup
 DB_PATH = os.getenv("DB_PATH", "/data/users.db")
 db_url = os.getenv("DATABASE_URL", DB_PATH)
 connect_args = {"check_same_thread": False} if db_url.startswith("sqlite") else {}
-engine = create_engine(db_url, connect_args=connect_args)
+## Connection pool: DB_POOL_SIZE kept open, up to DB_MAX_OVERFLOW more under load; a request
+## waits DB_POOL_TIMEOUT seconds for a free connection before it fails with 503
+engine = create_engine(
+    db_url,
+    connect_args=connect_args,
+    pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),  # reconnect before server-side idle timeouts
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "1") == "1",  # drop dead connections at checkout
+)
 Base = declarative_base()
-session = Session(bind=engine)
+SessionLocal = sessionmaker(bind=engine)
+
+DB_POOL_IN_USE = Gauge("auth_db_pool_connections_in_use", "Database connections checked out of the pool")
+DB_POOL_WAITING = Gauge("auth_db_pool_waiting", "Requests waiting for a database connection")
+DB_POOL_CHECKOUT_WAIT = Histogram("auth_db_pool_checkout_wait_seconds", "Time a request waited for a database connection")
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+def get_session():
+    """One session per request, closed (and its connection returned) when the request ends."""
+    with SessionLocal() as session:
+        DB_POOL_WAITING.inc()
+        start = time.perf_counter()
+        try:
+            session.connection()  # check out now, so the wait is measured here
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+            DB_POOL_WAITING.dec()
+        yield session
 
 class User(Base):
     __tablename__ = "users"
@@ -27,6 +73,14 @@ class User(Base):
     role = Column(String, default="customer")
     pwd_hash = Column(String, nullable=False)
 
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False)  # sha256 of the token; the token itself is never stored
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Boolean, nullable=False, default=False)
+
 Base.metadata.create_all(engine)
 
 ## Schemas
@@ -37,8 +91,12 @@ class UserIn(BaseModel):
 
 class TokenOut(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
 
+class RefreshIn(BaseModel):
+    refresh_token: str
+
 # Helpers
 def create_jwt(username: str, role: str):
     payload = {
@@ -48,32 +106,122 @@ def create_jwt(username: str, role: str):
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
 
-def verify_user(username: str, password: str):
-    stmt = select(User).where(User.username == username)
-    user = session.scalars(stmt).first()
-    if user and pwd_ctx.verify(password, user.pwd_hash):
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue_refresh_token(session: Session, user_id: int) -> str:
+    """Store a new refresh token for `user_id` (committed by the caller) and return it."""
+    # drop the user's expired tokens, revoked or not, so the table stays bounded. Revoked
+    # tokens that have not expired stay: presenting one again is how reuse is detected.
+    session.execute(
+        delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at <= datetime.datetime.utcnow())
+    )
+    token = secrets.token_urlsafe(32)
+    session.add(RefreshToken(
+        token_hash=token_digest(token),
+        user_id=user_id,
+        expires_at=datetime.datetime.utcnow() + datetime.timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+def find_user(session: Session, username: str):
+    user = session.scalars(select(User).where(User.username == username)).first()
+    # hand the connection back to the pool while bcrypt runs
+    session.close()
+    return user
+
+def add_user(session: Session, user: UserIn, pwd_hash: str):
+    session.add(User(username=user.username, pwd_hash=pwd_hash, role=user.role))
+    try:
+        session.commit()
+    except IntegrityError:
+        # registered by a concurrent request since the check in /register
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Username already taken")
+
+def start_session(session: Session, user_id: int) -> str:
+    refresh_token = issue_refresh_token(session, user_id)
+    session.commit()
+    return refresh_token
+
+async def verify_user(session: Session, username: str, password: str):
+    user = await run_in_threadpool(find_user, session, username)
+    if user and await hash_pool.verify(password, user.pwd_hash):
         return user
     return None
 
 # FastAPI
-app = FastAPI(title="Auth Service", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hash_pool.start()
+    yield
+    hash_pool.shutdown()
+
+app = FastAPI(title="Auth Service", version="0.2.0", lifespan=lifespan)
+
+@app.exception_handler(HashPoolBusy)
+async def hash_pool_busy(request: Request, exc: HashPoolBusy):
+    return JSONResponse({"detail": "Auth service busy, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
+
+@app.get("/metrics")
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
+@app.exception_handler(PoolTimeoutError)
+async def db_pool_timeout(request: Request, exc: PoolTimeoutError):
+    return JSONResponse({"detail": "Auth service busy, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
+
+## register/login are async: bcrypt is awaited on the event loop, so a queue of pending hashes
+## holds no threadpool threads that /refresh, /verify and /metrics need. DB calls run in the threadpool.
 @app.post("/register", status_code=201)
-def register(user: UserIn):
-    if session.scalars(select(User).where(User.username == user.username)).first():
+async def register(user: UserIn, session: Session = Depends(get_session)):
+    if await run_in_threadpool(find_user, session, user.username):
         raise HTTPException(status_code=409, detail="Username already taken")
-    hashed = pwd_ctx.hash(user.password)
-    session.add(User(username=user.username, pwd_hash=hashed, role=user.role))
-    session.commit()
+    hashed = await hash_pool.hash(user.password)
+    await run_in_threadpool(add_user, session, user, hashed)
     return {"msg": "registered successfully"}
 
 @app.post("/login", response_model=TokenOut)
-def login(user: UserIn):
-    db_user = verify_user(user.username, user.password)
+async def login(user: UserIn, session: Session = Depends(get_session)):
+    db_user = await verify_user(session, user.username, user.password)
     if not db_user:
-        raise HTTPException(status_code=401, details="invalid Credentials")
+        raise HTTPException(status_code=401, detail="invalid Credentials")
     token = create_jwt(db_user.username, db_user.role)
-    return {"access_token": token}
+    refresh_token = await run_in_threadpool(start_session, session, db_user.id)
+    return {"access_token": token, "refresh_token": refresh_token}
+
+## Refresh: trade a refresh token for a new access token. One indexed lookup, no bcrypt.
+## Tokens are single-use: each refresh revokes the presented token and issues a new one. A token
+## presented again after that was copied, so every refresh token of that user is revoked.
+@app.post("/refresh", response_model=TokenOut)
+def refresh(body: RefreshIn, session: Session = Depends(get_session)):
+    row = session.execute(
+        select(RefreshToken, User).join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == token_digest(body.refresh_token))
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    stored, user = row
+    if stored.expires_at <= datetime.datetime.utcnow():
+        raise HTTPException(status_code=401, detail="Refresh token expired")
+    # conditional update: of two concurrent refreshes with one token, only one wins
+    claimed = session.execute(
+        update(RefreshToken).where(RefreshToken.id == stored.id, RefreshToken.revoked.is_(False)).values(revoked=True)
+    ).rowcount
+    if not claimed:
+        session.execute(update(RefreshToken).where(RefreshToken.user_id == user.id).values(revoked=True))
+        session.commit()
+        raise HTTPException(status_code=401, detail="Refresh token already used")
+    refresh_token = issue_refresh_token(session, user.id)
+    session.commit()
+    return {"access_token": create_jwt(user.username, user.role), "refresh_token": refresh_token}
+
+@app.post("/logout", status_code=204)
+def logout(body: RefreshIn, session: Session = Depends(get_session)):
+    session.execute(
+        update(RefreshToken).where(RefreshToken.token_hash == token_digest(body.refresh_token)).values(revoked=True)
+    )
+    session.commit()
 
 # endpoint for token introspection
 @app.get("/verify")
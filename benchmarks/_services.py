@@ -0,0 +1,22 @@
+"""Helpers shared by the benchmark scripts."""
+import importlib.util, os, pathlib, sys, tempfile
+
+repo_root = pathlib.Path(__file__).resolve().parents[1]
+
+
+def load_flask_service(service: str, module_name: str):
+    """Import <service>/app.py with its tables created.
+
+    Uses DATABASE_URL when set (e.g. a local Postgres), otherwise a
+    throwaway SQLite file.
+    """
+    if "DATABASE_URL" not in os.environ:
+        db_file = pathlib.Path(tempfile.mkdtemp()) / f"{module_name}.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    spec = importlib.util.spec_from_file_location(module_name, repo_root / service / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    with module.app.app_context():
+        module.db.create_all()
+    return module
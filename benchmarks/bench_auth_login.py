@@ -0,0 +1,92 @@
+"""POST /login throughput of auth-service as the bcrypt pool grows.
+
+Starts auth-service under uvicorn once per HASH_WORKERS value, against a
+throwaway SQLite file, and keeps --concurrency logins in flight for
+--seconds. bcrypt dominates a login, so logins/s should grow with the
+pool up to the number of cores.
+
+    python benchmarks/bench_auth_login.py [--workers 1,2,4] [--concurrency 16] [--seconds 10]
+"""
+import argparse, os, pathlib, socket, subprocess, sys, tempfile, threading, time
+
+import httpx
+
+from _services import repo_root
+
+AUTH_DIR = repo_root / "auth-service"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env: dict):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=AUTH_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            httpx.get(f"{base}/metrics", timeout=1)
+            return proc, base
+        except httpx.TransportError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("auth-service did not start")
+
+
+def load(base: str, concurrency: int, seconds: float) -> tuple[float, int]:
+    ok, busy, lock = 0, 0, threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        nonlocal ok, busy
+        with httpx.Client(timeout=30) as client:
+            while time.perf_counter() < deadline:
+                r = client.post(f"{base}/login", json={"username": "bench", "password": "pw"})
+                with lock:
+                    if r.status_code == 200:
+                        ok += 1
+                    elif r.status_code == 503:
+                        busy += 1
+                    else:
+                        r.raise_for_status()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return ok / seconds, busy
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= os.cpu_count()) or "1")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    db_file = pathlib.Path(tempfile.mkdtemp()) / "users.db"
+    base_env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_file}", "HASH_MAX_PENDING": str(4 * args.concurrency)}
+
+    print(f"{'hash workers':>13}{'logins/s':>10}{'503s':>7}{'scaling':>9}")
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(",")):
+        proc, base = start_server({**base_env, "HASH_WORKERS": str(workers)})
+        try:
+            httpx.post(f"{base}/register", json={"username": "bench", "password": "pw"}, timeout=30)
+            rps, busy = load(base, args.concurrency, args.seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+        baseline = baseline or rps / workers
+        print(f"{workers:>13}{rps:>10.1f}{busy:>7}{rps / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+"""Cost of renewing a session: POST /login vs POST /refresh on auth-service.
+
+Starts auth-service under uvicorn against a throwaway SQLite file and
+renews one session --requests times each way, one call at a time.
+Reports latency and the server's CPU time per call (auth-service and
+its bcrypt pool processes, read from /proc). A login pays for a bcrypt
+verify; a refresh is one indexed lookup and a conditional update.
+
+    python benchmarks/bench_auth_refresh.py [--requests 200] [--rounds 12]
+"""
+import argparse, os, pathlib, statistics, tempfile, time
+
+import httpx
+
+from bench_auth_login import start_server
+
+TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def process_tree(pid: int) -> list[int]:
+    children = [int(c) for task in pathlib.Path(f"/proc/{pid}/task").iterdir()
+                for c in (task / "children").read_text().split()]
+    return [pid] + [p for child in children for p in process_tree(child)]
+
+
+def cpu_seconds(pid: int) -> float:
+    """utime + stime of `pid` and every live descendant (the bcrypt pool)."""
+    total = 0
+    for p in process_tree(pid):
+        fields = pathlib.Path(f"/proc/{p}/stat").read_text().rpartition(")")[2].split()
+        total += int(fields[11]) + int(fields[12])
+    return total / TICKS
+
+
+def measure(proc, call, requests: int) -> tuple[float, float, float]:
+    call()  # warm up (starts the bcrypt pool, opens connections)
+    latencies = []
+    cpu_before = cpu_seconds(proc.pid)
+    for _ in range(requests):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    cpu = cpu_seconds(proc.pid) - cpu_before
+    p50 = statistics.median(latencies)
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return p50 * 1000, p99 * 1000, cpu / requests * 1000
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS for the server")
+    args = parser.parse_args()
+
+    db_file = pathlib.Path(tempfile.mkdtemp()) / "users.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_file}", "BCRYPT_ROUNDS": str(args.rounds), "HASH_WORKERS": "1"}
+    proc, base = start_server(env)
+    try:
+        with httpx.Client(base_url=base, timeout=30) as client:
+            client.post("/register", json={"username": "bench", "password": "pw"}).raise_for_status()
+            refresh_token = None
+
+            def login():
+                nonlocal refresh_token
+                r = client.post("/login", json={"username": "bench", "password": "pw"})
+                r.raise_for_status()
+                refresh_token = r.json()["refresh_token"]
+
+            def refresh():
+                nonlocal refresh_token
+                r = client.post("/refresh", json={"refresh_token": refresh_token})
+                r.raise_for_status()
+                refresh_token = r.json()["refresh_token"]
+
+            print(f"{'renew via':>10}{'p50 ms':>9}{'p99 ms':>9}{'server CPU ms':>15}")
+            for name, call in (("/login", login), ("/refresh", refresh)):
+                p50, p99, cpu = measure(proc, call, args.requests)
+                print(f"{name:>10}{p50:>9.2f}{p99:>9.2f}{cpu:>15.2f}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    run()
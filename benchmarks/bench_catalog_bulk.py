@@ -0,0 +1,41 @@
+"""Catalog ingestion throughput: one POST /catalog per product vs POST /catalog/bulk.
+
+Runs catalog-service in-process (Flask test client) against SQLite, or
+against DATABASE_URL if set (Postgres uses COPY for the bulk path).
+
+    python benchmarks/bench_catalog_bulk.py [--rows 20000]
+"""
+import argparse, json, logging, time
+
+from _services import load_flask_service
+
+logging.disable(logging.INFO)
+
+
+def run(rows: int):
+    catalog = load_flask_service("catalog-service", "catalog_app")
+    client = catalog.app.test_client()
+    products = [{"name": f"Supplier part {i}", "price": 1 + i % 500} for i in range(rows)]
+
+    per_item_rows = max(1, rows // 10)  # the slow path; a slice is enough for a rate
+    start = time.perf_counter()
+    for product in products[:per_item_rows]:
+        assert client.post("/catalog", json=product).status_code == 201
+    per_item = per_item_rows / (time.perf_counter() - start)
+
+    body = "\n".join(json.dumps(p) for p in products)
+    start = time.perf_counter()
+    report = client.post("/catalog/bulk", data=body, content_type="application/x-ndjson").get_json()
+    bulk = report["inserted"] / (time.perf_counter() - start)
+    assert report["inserted"] == rows, report
+
+    print(f"{'path':<18}{'rows':>8}{'rows/s':>12}")
+    print(f"{'POST /catalog':<18}{per_item_rows:>8}{per_item:>12.0f}")
+    print(f"{'POST /catalog/bulk':<18}{rows:>8}{bulk:>12.0f}")
+    print(f"speedup: {bulk / per_item:.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    run(parser.parse_args().rows)
@@ -0,0 +1,88 @@
+"""Catalog search latency over a synthetic catalog: unindexed LIKE scan vs the search index.
+
+Runs catalog-service in-process (Flask test client) against SQLite, or
+against DATABASE_URL if set. The index is created by running the
+232df4843847 migration's upgrade() (FTS5 on SQLite, pg_trgm + tsvector
+on Postgres).
+
+    python benchmarks/bench_catalog_search.py [--rows 1000000] [--queries 200]
+"""
+import argparse, importlib.util, logging, random, statistics, time
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from _services import load_flask_service, repo_root
+
+logging.disable(logging.INFO)
+
+ADJECTIVES = ["red", "blue", "steel", "wool", "oak", "copper", "vintage", "compact", "deluxe", "outdoor",
+              "silent", "smart", "heavy", "mini", "classic", "travel", "ceramic", "cotton", "carbon", "glass"]
+NOUNS = ["kettle", "scarf", "lamp", "chair", "drill", "backpack", "mug", "speaker", "blanket", "bottle",
+         "charger", "jacket", "table", "pan", "keyboard", "tent", "watch", "helmet", "vase", "shelf"]
+
+
+def fill(catalog, rows: int, chunk: int = 10_000):
+    rng = random.Random(0)
+    with catalog.app.app_context():
+        for start in range(0, rows, chunk):
+            catalog.insert_chunk([
+                (f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {i}", 1 + i % 500)
+                for i in range(start, min(rows, start + chunk))
+            ])
+        catalog.db.session.commit()
+
+
+def create_index(catalog):
+    path = next((repo_root / "catalog-service/migrations/versions").glob("232df4843847_*.py"))
+    spec = importlib.util.spec_from_file_location("search_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with catalog.app.app_context():
+        with catalog.db.engine.begin() as conn, Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+        catalog.search_backend.cache_clear()
+        return catalog.search_backend()
+
+
+def latencies(client, queries: list[str]) -> list[float]:
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        assert client.get(f"/catalog/search?q={q}&limit=20").status_code == 200
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(rows: int, queries: int):
+    catalog = load_flask_service("catalog-service", "catalog_app")
+    client = catalog.app.test_client()
+    start = time.perf_counter()
+    fill(catalog, rows)
+    print(f"loaded {rows} rows in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(1)
+    mix = [rng.choice([f"{rng.choice(NOUNS)}", f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+                       f"{rng.choice(NOUNS)[:3]}"]) for _ in range(queries)]
+
+    with catalog.app.app_context():
+        catalog.search_backend.cache_clear()
+        results = {catalog.search_backend(): latencies(client, mix)}
+    start = time.perf_counter()
+    backend = create_index(catalog)
+    print(f"built {backend} index in {time.perf_counter() - start:.1f}s")
+    results[backend] = latencies(client, mix)
+
+    print(f"{'backend':<12}{'queries':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, timings in results.items():
+        p50 = statistics.median(timings) * 1000
+        p99 = statistics.quantiles(timings, n=100)[98] * 1000
+        print(f"{name:<12}{len(timings):>9}{p50:>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.rows, args.queries)
@@ -0,0 +1,100 @@
+"""Throughput of catalog-service under gunicorn as the worker count grows.
+
+Starts the production server (catalog-service/gunicorn.conf.py) against
+a throwaway SQLite file, or DATABASE_URL if set, once per worker count.
+Each run is loaded by client processes on GET /catalog, which is served
+from the pre-serialized page snapshots, so the work is mostly request
+handling in the workers. Run on a machine with spare cores for the
+clients; with both on the same cores the curve flattens early.
+
+    python benchmarks/bench_flask_workers.py [--workers 1,2,4] [--clients 8] [--seconds 10]
+"""
+import argparse, json, multiprocessing, os, pathlib, socket, subprocess, sys, tempfile, time
+
+import httpx
+
+from _services import repo_root
+
+CATALOG_DIR = repo_root / "catalog-service"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, threads: int, env: dict):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=CATALOG_DIR, env={**env, "PORT": str(port), "WEB_WORKERS": str(workers), "WEB_THREADS": str(threads)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            httpx.get(f"{base}/health", timeout=1)
+            return proc, base
+        except httpx.TransportError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def client(url: str, seconds: float, results):
+    done, deadline = 0, time.perf_counter() + seconds
+    with httpx.Client() as http:
+        while time.perf_counter() < deadline:
+            http.get(url).raise_for_status()
+            done += 1
+    results.put(done)
+
+
+def load(url: str, clients: int, seconds: float) -> float:
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(url, seconds, results)) for _ in range(clients)]
+    for p in procs:
+        p.start()
+    total = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return total / seconds
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= os.cpu_count()) or "1")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=2 * os.cpu_count())
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    tmp = pathlib.Path(tempfile.mkdtemp())
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp / "prometheus")}
+    env.setdefault("DATABASE_URL", f"sqlite:///{tmp / 'catalog.db'}")
+    (tmp / "prometheus").mkdir()
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=CATALOG_DIR, env=env, check=True, capture_output=True)
+
+    proc, base = start_server(1, args.threads, env)
+    body = "\n".join(json.dumps({"name": f"Worker part {i}", "price": 1 + i % 100}) for i in range(args.rows))
+    httpx.post(f"{base}/catalog/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).raise_for_status()
+    proc.terminate()
+    proc.wait()
+
+    print(f"{'workers':>8}{'threads':>9}{'req/s':>10}{'scaling':>9}")
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(",")):
+        proc, base = start_server(workers, args.threads, env)
+        try:
+            rps = load(f"{base}/catalog?limit=50", args.clients, args.seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+        baseline = baseline or rps / workers
+        print(f"{workers:>8}{args.threads:>9}{rps:>10.0f}{rps / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    run()
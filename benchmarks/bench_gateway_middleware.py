@@ -0,0 +1,109 @@
+"""Gateway middleware overhead: the old BaseHTTPMiddleware stack vs the pure-ASGI pipeline.
+
+Both apps serve the same routes in-process through httpx.ASGITransport, with the
+catalog upstream replaced by an instant mock, so the numbers isolate the gateway.
+
+    python benchmarks/bench_gateway_middleware.py [--requests 5000] [--concurrency 50]
+"""
+import argparse, asyncio, json, logging, os, pathlib, sys, time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api-gateway"))
+os.environ.setdefault("PRODUCTS_CACHE_MAX_ENTRIES", "0")  # measure the proxy path, not the cache
+os.environ.setdefault("RATE_LIMIT_DEFAULT", "0")          # one client hammering one route would get 429s
+os.environ.setdefault("GATEWAY_MAX_IN_FLIGHT", "0")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from jose import JWTError  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+import main  # noqa: E402
+
+logging.disable(logging.INFO)  # keep per-request log lines out of the measurement output
+
+
+## The stack as it was before the pure-ASGI rewrite
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        main.logger.info(f"-> {request.method} {request.url.path}")
+        response = await call_next(request)
+        main.logger.info(f"<- {request.method} {request.url.path} {response.status_code}")
+        return response
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "OPTIONS" or request.url.path in main.PUBLIC_PATHS:
+            return await call_next(request)
+        if request.url.path.startswith("/products") and request.method == "GET":
+            return await call_next(request)
+        auth_header = request.headers.get("authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            raise HTTPException(401, "Missing Bearer token")
+        try:
+            payload = main.verify_token(auth_header.split(" ", 1)[1])
+        except JWTError:
+            raise HTTPException(401, "Invalid or expired token")
+        request.state.user = payload["sub"]
+        request.state.role = payload["role"]
+        return await call_next(request)
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI()
+    app.router.routes.extend(main.app.router.routes)
+    app.add_middleware(CORSMiddleware, allow_origins=["http://localhost:5173"], allow_credentials=True,
+                       allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(LegacyLoggingMiddleware)
+    app.add_middleware(LegacyAuthMiddleware)
+
+    @app.middleware("http")
+    async def prometheus_middleware(request: Request, call_next):
+        response = await call_next(request)
+        main.REQUEST_COUNT.labels(request.method, request.url.path, response.status_code).inc()
+        return response
+
+    return app
+
+
+async def run_load(app, path: str, requests: int, concurrency: int):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                r = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                assert r.status_code == 200, r.status_code
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return requests / elapsed, latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def bench(requests: int, concurrency: int):
+    products = json.dumps([{"id": i, "name": f"Part {i}", "price": 10.0 + i} for i in range(50)]).encode()
+    main.catalog_client.transport = httpx.MockTransport(lambda req: httpx.Response(
+        200, headers={"content-type": "application/json"}, stream=httpx.ByteStream(products)))
+
+    print(f"{'stack':<8}{'path':<11}{'req/s':>10}{'p99 ms':>10}")
+    for name, app in (("before", legacy_app()), ("after", main.app)):
+        for path in ("/health", "/products"):
+            await run_load(app, path, min(requests, 200), concurrency)  # warm-up
+            rps, p99 = await run_load(app, path, requests, concurrency)
+            print(f"{name:<8}{path:<11}{rps:>10.0f}{p99 * 1000:>10.2f}")
+    await main.upstreams.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(bench(args.requests, args.concurrency))
@@ -0,0 +1,48 @@
+"""Per-request CPU cost of JWT verification in the gateway, with and without the claims cache.
+
+    python benchmarks/bench_jwt_cache.py [--requests 50000] [--users 500] [--rps 5000]
+"""
+import argparse, datetime, pathlib, random, sys, time
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "api-gateway"))
+
+from jose import jwt  # noqa: E402
+
+import main  # noqa: E402
+
+
+def make_tokens(users: int) -> list[str]:
+    exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=60)
+    return [
+        jwt.encode({"sub": f"user{i}", "role": "user", "exp": exp}, main.JWT_SECRET, algorithm=main.ALGORITHM)
+        for i in range(users)
+    ]
+
+
+def cpu_per_call(fn, tokens: list[str], requests: int) -> float:
+    start = time.process_time()
+    for _ in range(requests):
+        fn(random.choice(tokens))
+    return (time.process_time() - start) / requests
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=500, help="distinct live tokens")
+    parser.add_argument("--rps", type=int, default=5_000, help="load used to express cost as CPU share")
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.users)
+    uncached = cpu_per_call(lambda t: jwt.decode(t, main.JWT_SECRET, algorithms=[main.ALGORITHM]), tokens, args.requests)
+    main.jwt_cache.invalidate()
+    cached = cpu_per_call(main.verify_token, tokens, args.requests)
+
+    print(f"{'mode':<10}{'us/request':>12}{f'CPU% @ {args.rps} rps':>20}")
+    for name, cost in (("decode", uncached), ("cached", cached)):
+        print(f"{name:<10}{cost * 1e6:>12.1f}{cost * args.rps * 100:>20.1f}")
+    print(f"speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    run()
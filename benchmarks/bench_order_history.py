@@ -0,0 +1,77 @@
+"""GET /orders latency as the orders table grows, with and without ix_order_username_id.
+
+Runs order-service in-process (Flask test client) against SQLite, or
+against DATABASE_URL if set. Orders are spread over --users users; each
+request reads the newest page of a random user.
+
+    python benchmarks/bench_order_history.py [--sizes 100000,1000000,10000000] [--users 10000]
+"""
+import argparse, logging, random, statistics, time
+
+from _services import load_flask_service
+
+logging.disable(logging.INFO)
+
+
+def grow(orders, target: int, users: int, chunk: int = 50_000):
+    db, Order = orders.db, orders.Order
+    rng = random.Random(0)
+    with orders.app.app_context():
+        current = db.session.execute(db.select(db.func.count()).select_from(Order)).scalar()
+        while current < target:
+            n = min(chunk, target - current)
+            db.session.execute(db.insert(Order), [
+                {"username": f"user{rng.randrange(users)}", "product_id": 1, "quantity": 1, "status": "created"}
+                for _ in range(n)
+            ])
+            db.session.commit()
+            current += n
+
+
+def set_index(orders, present: bool):
+    with orders.app.app_context():
+        index = next(i for i in orders.Order.__table__.indexes if i.name == "ix_order_username_id")
+        if present:
+            index.create(orders.db.engine, checkfirst=True)
+        else:
+            index.drop(orders.db.engine, checkfirst=True)
+
+
+def latencies(client, users: int, requests: int) -> list[float]:
+    rng = random.Random(1)
+    timings = []
+    for _ in range(requests):
+        headers = {"X-User": f"user{rng.randrange(users)}"}
+        start = time.perf_counter()
+        assert client.get("/orders?limit=20", headers=headers).status_code == 200
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,1000000,10000000")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--unindexed-max", type=int, default=1_000_000,
+                        help="skip the full-scan run above this size (it only gets slower)")
+    args = parser.parse_args()
+
+    orders = load_flask_service("order-service", "order_app")
+    client = orders.app.test_client()
+    print(f"{'rows':>10}{'index':>7}{'p50 ms':>10}{'p99 ms':>10}")
+    for size in (int(n) for n in args.sizes.split(",")):
+        grow(orders, size, args.users)
+        for indexed in (True, False):
+            if not indexed and size > args.unindexed_max:
+                continue
+            set_index(orders, indexed)
+            timings = latencies(client, args.users, args.requests)
+            p50 = statistics.median(timings) * 1000
+            p99 = statistics.quantiles(timings, n=100)[98] * 1000
+            print(f"{size:>10}{'yes' if indexed else 'no':>7}{p50:>10.2f}{p99:>10.2f}")
+        set_index(orders, True)
+
+
+if __name__ == "__main__":
+    run()
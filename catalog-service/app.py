@@ -1,33 +1,124 @@
 
+import csv
+import hashlib
+import io
+import json
+import functools
 import logging
 import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 
-from flask import Flask, jsonify, abort, request, Response
+from flask import Flask, jsonify, abort, request, Response, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
-from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from werkzeug.exceptions import ServiceUnavailable
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST, multiprocess
 
+## endpoint is the url rule (/catalog/<int:product_id>), never the raw path
 REQUEST_COUNT = Counter("catalog_requests_total", "Total requests to catalog", ["method", "endpoint", "http_status"])
+REQUEST_LATENCY = Histogram("catalog_request_duration_seconds", "Catalog request latency", ["method", "endpoint"])
 
 app = Flask(__name__)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(request_id)s] %(message)s")
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+## Request tracing: every request carries an id (the gateway's X-Request-ID, or a new one) that is
+## logged and echoed back; the time spent in the handler, the database is returned
+## as a Server-Timing header
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+@app.before_request
+def start_trace():
+    request_id = request.headers.get("X-Request-ID", "")
+    g.request_id = request_id if REQUEST_ID_PATTERN.fullmatch(request_id) else uuid.uuid4().hex
+    g.spans = []
+
+def add_span(name, seconds):
+    # no-op outside a request (e.g. a migration or a script using the app context)
+    if has_request_context() and "spans" in g:
+        g.spans.append((name, seconds))
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - start)
+
+def server_timing(spans):
+    """[(name, seconds)] -> "handler;dur=4.2, db;dur=1.3;desc=\"3 calls\"" (repeated names summed)."""
+    totals = {}
+    for name, seconds in spans:
+        total, calls = totals.get(name, (0.0, 0))
+        totals[name] = (total + seconds, calls + 1)
+    return ", ".join(
+        f"{name};dur={total * 1000:.1f}" + (f';desc="{calls} calls"' if calls > 1 else "")
+        for name, (total, calls) in totals.items()
+    )
+
+@app.after_request
+def finish_trace(response):
+    if "spans" in g:
+        add_span("handler", time.perf_counter() - g.request_start)
+        response.headers["X-Request-ID"] = g.request_id
+        response.headers["Server-Timing"] = server_timing(g.spans)
+    return response
+
+_make_log_record = logging.getLogRecordFactory()
+
+def _log_record_with_request_id(*args, **kwargs):
+    record = _make_log_record(*args, **kwargs)
+    if has_request_context() and "request_id" in g:
+        record.request_id = g.request_id
+    elif not hasattr(record, "request_id"):
+        record.request_id = "-"
+    return record
+
+logging.setLogRecordFactory(_log_record_with_request_id)
+
+STREAMED_ENDPOINTS = {"bulk_add_products"}  # body is read incrementally by the view, don't buffer it here
 
 @app.before_request
 def log_request():
-    app.logger.info(f"-> {request.method} {request.path} {request.get_json(silent=True)}")
+    body = "<streamed>" if request.endpoint in STREAMED_ENDPOINTS else request.get_json(silent=True)
+    app.logger.info(f"-> {request.method} {request.path} {body}")
 
 @app.after_request
 def log_response(response):
     app.logger.info(f"<- {request.method} {request.path} {response.status_code}")
     return response
 
+def route_template():
+    # unmatched paths (404s) share one label instead of one series per path
+    return request.url_rule.rule if request.url_rule else "<unmatched>"
+
 @app.after_request
 def after_request(response):
-    REQUEST_COUNT.labels(request.method, request.path, response.status_code).inc()
+    endpoint = route_template()
+    REQUEST_COUNT.labels(request.method, endpoint, response.status_code).inc()
+    if "request_start" in g:
+        REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - g.request_start)
     return response
 
 @app.route('/metrics')
 def metrics():
-    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # under gunicorn every worker writes its own files there; sum them on each scrape
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
 
 
 @app.get('/health')
@@ -49,8 +140,66 @@ def _hello_world():
 db_path = os.getenv("DB_PATH", "sqlite:////data/catalog.db")  # still works outside Docker
 db_url = os.getenv("DATABASE_URL", db_path)
 app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+## Connection pool (per worker process): DB_POOL_SIZE kept open, up to DB_MAX_OVERFLOW more under
+## load; a request waits DB_POOL_TIMEOUT seconds for a free connection before it fails with 503
+## Unlabeled multiprocess gauges open their file in PROMETHEUS_MULTIPROC_DIR as soon as they are
+## created, and alembic's env.py imports this module before anything else has made the directory
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+DB_POOL_IN_USE = Gauge("catalog_db_pool_connections_in_use", "Database connections checked out of the pool", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("catalog_db_pool_overflow", "Open database connections beyond DB_POOL_SIZE", multiprocess_mode="livesum")
+DB_POOL_CHECKOUT_WAIT = Histogram("catalog_db_pool_checkout_wait_seconds", "Time spent getting a connection from the pool")
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that times every checkout and reports its overflow.
+
+    Pool events only fire once a connection has been handed out, so the
+    wait (queueing for a free connection, or opening a new one) is timed here.
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+            DB_POOL_OVERFLOW.set(max(0, self.overflow()))
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        DB_POOL_OVERFLOW.set(max(0, self.overflow()))
+
+@event.listens_for(TimedQueuePool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+@event.listens_for(TimedQueuePool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "poolclass": TimedQueuePool,
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),  # reconnect before server-side idle timeouts
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",  # drop dead connections at checkout
+}
 db = SQLAlchemy(app)
 
+@app.errorhandler(PoolTimeoutError)
+def db_pool_timeout(e):
+    return ServiceUnavailable(description="No free database connection, retry shortly", retry_after=1).get_response()
+
+## Statement time for Server-Timing ("db" span)
+with app.app_context():
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+    @event.listens_for(db.engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        add_span("db", time.perf_counter() - conn.info["statement_start"].pop())
+
 ## Defining the Product model
 class Product(db.Model):
     __tablename__ = 'product'
@@ -65,16 +214,200 @@ class Product(db.Model):
             'price': self.price
         }
 
+## Catalog version: a single row bumped inside every transaction that writes products
+## (see bump_catalog_version), so it changes exactly when a write commits
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+def bump_catalog_version():
+    """Call just before committing a product write; the row lock is then held only for the commit."""
+    bumped = db.session.execute(
+        db.update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1)
+    ).rowcount
+    if not bumped:  # database created without migrations (db.create_all)
+        db.session.add(CatalogVersion(id=1, version=1))
+
 # create database and table => runs during startup if the database does not exist
 # with app.app_context():
 #     db.create_all()
 
-## GET all products
+## Keyset pagination for GET /catalog
+CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", 100))
+CATALOG_MAX_PAGE_SIZE = int(os.getenv("CATALOG_MAX_PAGE_SIZE", 1000))
+
+def page_args():
+    """Read ?limit=&cursor= ; the cursor is the id of the last product already seen."""
+    try:
+        limit = int(request.args.get("limit", CATALOG_PAGE_SIZE))
+        cursor = int(request.args.get("cursor", 0))
+    except ValueError:
+        abort(400, description="limit and cursor must be integers")
+    if not 0 < limit <= CATALOG_MAX_PAGE_SIZE:
+        abort(400, description=f"limit must be between 1 and {CATALOG_MAX_PAGE_SIZE}")
+    if cursor < 0:
+        abort(400, description="cursor must not be negative")
+    return limit, cursor
+
+## Pre-serialized GET /catalog pages
+## A page is tagged with the catalog version it was built at (a primary-key lookup per request)
+## and rebuilt only once a write has committed. max(id) would not do: ids are handed out at insert
+## time, so a long bulk load can commit lower ids after a later single insert. Each page is kept
+## as the exact JSON bytes plus a strong ETag (a hash of those bytes).
+CATALOG_SNAPSHOT_MAX_PAGES = int(os.getenv("CATALOG_SNAPSHOT_MAX_PAGES", 256))
+SNAPSHOT_REQUESTS = Counter("catalog_snapshot_requests_total", "GET /catalog pages by snapshot outcome", ["result"])
+
+_snapshots = OrderedDict()  # (limit, cursor) -> (version, etag, body, next_cursor); LRU order
+_snapshots_lock = threading.Lock()
+
+def catalog_version():
+    return db.session.execute(db.select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar() or 0
+
+def build_page(limit, cursor, version):
+    # plain rows instead of ORM objects; one extra row tells us whether there is a next page
+    rows = db.session.execute(
+        db.select(Product.id, Product.name, Product.price)
+        .where(Product.id > cursor)
+        .order_by(Product.id)
+        .limit(limit + 1)
+    ).all()
+    page = [{'id': r.id, 'name': r.name, 'price': r.price} for r in rows[:limit]]
+    body = json.dumps(page, separators=(",", ":")).encode()
+    next_cursor = str(page[-1]['id']) if len(rows) > limit else None
+    return version, hashlib.blake2b(body, digest_size=16).hexdigest(), body, next_cursor
+
+def catalog_page(limit, cursor):
+    key, version = (limit, cursor), catalog_version()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None:
+            _snapshots.move_to_end(key)
+    if snapshot is not None and snapshot[0] == version:
+        SNAPSHOT_REQUESTS.labels("hit").inc()
+        return snapshot
+    snapshot = build_page(limit, cursor, version)
+    SNAPSHOT_REQUESTS.labels("built").inc()
+    if CATALOG_SNAPSHOT_MAX_PAGES > 0:
+        with _snapshots_lock:
+            _snapshots[key] = snapshot
+            _snapshots.move_to_end(key)
+            while len(_snapshots) > CATALOG_SNAPSHOT_MAX_PAGES:
+                _snapshots.popitem(last=False)
+    return snapshot
+
+## GET products, one page at a time (id > cursor, ordered by id)
 @app.route('/catalog', methods=['GET'])
 def get_products():
-    products = Product.query.all()
-    return jsonify([p.as_dict() for p in products])
+    limit, cursor = page_args()
+    _, etag, body, next_cursor = catalog_page(limit, cursor)
+    if request.if_none_match.contains_weak(etag):
+        SNAPSHOT_REQUESTS.labels("not_modified").inc()
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"  # clients may keep it, but must revalidate
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+## Multi-get: many ids in one indexed IN query
+LOOKUP_MAX_IDS = int(os.getenv("LOOKUP_MAX_IDS", 1000))
+
+def lookup_ids():
+    """ids from ?ids=1,2,3 (GET) or {"ids": [1, 2, 3]} (POST), de-duplicated in request order."""
+    if request.method == "POST":
+        ids = (request.get_json(silent=True) or {}).get("ids")
+    else:
+        ids = [i for i in request.args.get("ids", "").split(",") if i.strip()]
+    if not isinstance(ids, list) or not ids:
+        abort(400, description="ids is required")
+    try:
+        if any(isinstance(i, (bool, float)) for i in ids):
+            raise ValueError
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        abort(400, description="ids must be integers")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > LOOKUP_MAX_IDS:
+        abort(400, description=f"At most {LOOKUP_MAX_IDS} ids per lookup")
+    return ids
+
+@app.route('/catalog/lookup', methods=['GET', 'POST'])
+def lookup_products():
+    ids = lookup_ids()
+    rows = db.session.execute(
+        db.select(Product.id, Product.name, Product.price).where(Product.id.in_(ids))
+    ).all()
+    found = {r.id: {'id': r.id, 'name': r.name, 'price': r.price} for r in rows}
+    return jsonify({
+        "products": [found[i] for i in ids if i in found],
+        "missing": [i for i in ids if i not in found],
+    })
 
+## Search: GET /catalog/search?q=&limit=&cursor=
+## Backed by the indexes from migration 232df4843847: pg_trgm + tsvector on Postgres, FTS5 on
+## SQLite. Without them (e.g. a db built by create_all) it falls back to an unindexed LIKE scan;
+## on a Postgres without pg_trgm (not every managed one allows it) it ranks by ts_rank alone.
+## Results are ranked, so cursor is an offset into the ranking rather than an id.
+SEARCH_MAX_TERMS = 8
+
+@functools.lru_cache(maxsize=None)
+def search_backend():
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        with db.engine.connect() as conn:
+            has_trgm = conn.execute(db.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        return "pg_trgm" if has_trgm else "tsvector"
+    if dialect == "sqlite" and db.inspect(db.engine).has_table("product_fts"):
+        return "fts5"
+    return "like"
+
+def search_rows(q, terms, limit, offset):
+    backend = search_backend()
+    if backend in ("pg_trgm", "tsvector"):
+        prefix = re.sub(r"([%_\\])", r"\\\1", q) + "%"
+        rank = "ts_rank(to_tsvector('simple', name), to_tsquery('simple', :tsq))"
+        if backend == "pg_trgm":
+            rank += " + similarity(name, :q)"
+        return db.session.execute(db.text(
+            "SELECT id, name, price FROM product"
+            " WHERE to_tsvector('simple', name) @@ to_tsquery('simple', :tsq) OR name ILIKE :prefix"
+            f" ORDER BY {rank} DESC, id"
+            " LIMIT :limit OFFSET :offset"
+        ), {"tsq": " & ".join(f"{t}:*" for t in terms), "prefix": prefix, "q": q,
+            "limit": limit, "offset": offset}).all()
+    if backend == "fts5":
+        return db.session.execute(db.text(
+            "SELECT p.id, p.name, p.price FROM product_fts JOIN product p ON p.id = product_fts.rowid"
+            " WHERE product_fts MATCH :match ORDER BY product_fts.rank, p.id"
+            " LIMIT :limit OFFSET :offset"
+        ), {"match": " ".join(f'"{t}"*' for t in terms), "limit": limit, "offset": offset}).all()
+    # fallback: every term must appear somewhere in the name; prefix matches rank first
+    like = [t.replace("_", "\\_") for t in terms]  # "_" is a \w character but a LIKE wildcard
+    return db.session.execute(
+        db.select(Product.id, Product.name, Product.price)
+        .where(*[Product.name.ilike(f"%{t}%", escape="\\") for t in like])
+        .order_by(db.case((Product.name.ilike(f"{like[0]}%", escape="\\"), 0), else_=1),
+                  db.func.length(Product.name), Product.id)
+        .limit(limit).offset(offset)
+    ).all()
+
+@app.route('/catalog/search', methods=['GET'])
+def search_products():
+    q = request.args.get("q", "").strip()
+    # word characters only: nothing the user types can change the FTS / tsquery syntax
+    terms = re.findall(r"\w+", q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        abort(400, description="q must contain at least one word")
+    limit, offset = page_args()
+    rows = search_rows(q, terms, limit + 1, offset)
+    response = jsonify([{'id': r.id, 'name': r.name, 'price': r.price} for r in rows[:limit]])
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = str(offset + limit)
+    return response
 
 ## GET product by id
 @app.route('/catalog/<int:product_id>', methods=['GET'])
@@ -103,9 +436,117 @@ def add_product():
     )
 
     db.session.add(new_product)
-    db.session.commit()
+    bump_catalog_version()
+    with span("commit"):
+        db.session.commit()
     
     return jsonify(new_product.as_dict()), 201
 
+## Bulk ingestion: POST /catalog/bulk with an NDJSON (application/x-ndjson) or JSON-array body.
+## The body is parsed as it streams in and valid rows are inserted BULK_CHUNK_SIZE at a time.
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+BULK_MAX_REPORTED_ERRORS = int(os.getenv("BULK_MAX_REPORTED_ERRORS", 1000))
+
+class MalformedBody(ValueError):
+    pass
+
+def iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e  # a bad line is that row's error, the rest of the feed still loads
+
+def iter_json_array(stream, chunk_size=64 * 1024):
+    """Yield the elements of a top-level JSON array without reading the whole body."""
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(stream, encoding="utf-8")
+    buf, pos, started, eof = "", 0, False, False
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != "[":
+                    raise MalformedBody("Body must be a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                end = None
+            # an element that ends exactly at the end of the buffer may be cut short (e.g. a number)
+            if end is not None and (end < len(buf) or eof):
+                yield item
+                pos = end
+                continue
+        if eof:
+            raise MalformedBody(f"Malformed JSON near: {buf[pos:pos + 40]!r}" if buf[pos:].strip() else "Unterminated JSON array")
+        chunk = reader.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+def validate_row(row):
+    """Return (name, price) or raise ValueError with the reason."""
+    if isinstance(row, ValueError):
+        raise ValueError(f"Invalid JSON: {row}")
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    name, price = row.get("name"), row.get("price")
+    if not isinstance(name, str) or not name.strip() or len(name) > 80:
+        raise ValueError("name must be a non-empty string of at most 80 characters")
+    if isinstance(price, bool) or not isinstance(price, (int, float)) or price <= 0:
+        raise ValueError("price must be a number greater than 0")
+    return name, float(price)
+
+def insert_chunk(rows):
+    if db.engine.dialect.name == "postgresql" and db.engine.dialect.driver == "psycopg2":
+        # COPY streams the whole chunk in one round trip
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        cursor.copy_expert("COPY product (name, price) FROM STDIN WITH (FORMAT csv)", buf)
+    else:
+        # multi-row INSERT ... VALUES (SQLAlchemy batches executemany into one statement)
+        db.session.execute(db.insert(Product), [{"name": n, "price": p} for n, p in rows])
+
+@app.route('/catalog/bulk', methods=['POST'])
+def bulk_add_products():
+    ndjson = request.mimetype in ("application/x-ndjson", "application/jsonl")
+    rows = iter_ndjson(request.stream) if ndjson else iter_json_array(request.stream)
+
+    inserted, failed, errors, chunk = 0, 0, [], []
+    try:
+        for index, row in enumerate(rows):
+            try:
+                chunk.append(validate_row(row))
+            except ValueError as e:
+                failed += 1
+                if len(errors) < BULK_MAX_REPORTED_ERRORS:
+                    errors.append({"row": index, "error": str(e)})
+                continue
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                insert_chunk(chunk)
+                inserted += len(chunk)
+                chunk = []
+        if chunk:
+            insert_chunk(chunk)
+            inserted += len(chunk)
+    except MalformedBody as e:
+        db.session.rollback()
+        abort(400, description=str(e))
+    if inserted:
+        bump_catalog_version()
+    with span("commit"):
+        db.session.commit()
+
+    return jsonify({"inserted": inserted, "failed": failed, "errors": errors})
+
 if __name__=="__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
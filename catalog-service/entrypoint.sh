@@ -1,7 +1,23 @@
 #!/bin/sh
+set -e
 
+# per-worker metric files from a previous run would be summed into /metrics. alembic imports
+# app.py, whose multiprocess gauges write into the directory, so it must exist before migrating
+reset_metrics_dir() {
+    if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+        rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    fi
+}
+
+reset_metrics_dir
 echo "Running Alembic migrations..."
 alembic upgrade head
+reset_metrics_dir  # drop the migration process's own metric files
+
+if [ "$FLASK_DEV_SERVER" = "1" ]; then
+    echo "Starting Flask development server..."
+    exec python app.py
+fi
 
-echo "Starting Flask server..."
-exec python app.py
+echo "Starting gunicorn..."
+exec gunicorn -c gunicorn.conf.py app:app
@@ -0,0 +1,57 @@
+"""add product search indexes
+
+Revision ID: 232df4843847
+Revises: 86020308cc51
+Create Date: 2026-10-18 10:12:41.502193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '232df4843847'
+down_revision = '86020308cc51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # trigram index: prefix / substring / typo-tolerant matches on name
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_product_name_trgm ON product USING gin (name gin_trgm_ops)")
+        # full-text index: ranked word matches
+        op.execute("CREATE INDEX ix_product_name_fts ON product USING gin (to_tsvector('simple', name))")
+    elif dialect == 'sqlite':
+        # external-content FTS5 table kept in sync with product by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE product_fts USING fts5("
+            "name, content='product', content_rowid='id', tokenize='unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER product_fts_ai AFTER INSERT ON product BEGIN "
+            "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER product_fts_ad AFTER DELETE ON product BEGIN "
+            "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER product_fts_au AFTER UPDATE ON product BEGIN "
+            "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+            "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END"
+        )
+        op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_product_name_fts")
+        op.execute("DROP INDEX IF EXISTS ix_product_name_trgm")
+    elif dialect == 'sqlite':
+        for trigger in ('product_fts_au', 'product_fts_ad', 'product_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS product_fts")
@@ -0,0 +1,30 @@
+"""create catalog_version table
+
+Revision ID: b41c7e2d9f83
+Revises: 232df4843847
+Create Date: 2026-10-18 16:05:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41c7e2d9f83'
+down_revision = '232df4843847'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # one row, bumped by every transaction that writes products (GET /catalog snapshot version)
+    catalog_version = op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_version, [{'id': 1, 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_version')
@@ -13,4 +13,34 @@ api.interceptors.request.use(config => {
     return config;
 });
 
-export default api;
\ No newline at end of file
+// access tokens are short-lived: on a 401, trade the refresh token for a new pair and retry once
+let refreshing: Promise<string> | null = null;
+
+const refreshAccessToken = async () => {
+    const { data } = await axios.post(`${api.defaults.baseURL}/auth/refresh`, {
+        refresh_token: localStorage.getItem("refresh_token"),
+    });
+    localStorage.setItem("token", data.access_token);
+    localStorage.setItem("refresh_token", data.refresh_token);
+    return data.access_token as string;
+};
+
+api.interceptors.response.use(undefined, async error => {
+    const config = error.config;
+    if (error.response?.status !== 401 || config._retried || !localStorage.getItem("refresh_token")) {
+        throw error;
+    }
+    config._retried = true;
+    // concurrent 401s share one refresh; refresh tokens are single-use
+    refreshing = refreshing ?? refreshAccessToken().finally(() => { refreshing = null; });
+    try {
+        await refreshing;
+    } catch {
+        localStorage.removeItem("token");
+        localStorage.removeItem("refresh_token");
+        throw error;
+    }
+    return api(config);
+});
+
+export default api;
@@ -24,13 +24,19 @@ export function AuthProvider ({ children }: { children: ReactNode }) {
         const payload = JSON.parse(atob(data.access_token.split(".")[1]));
         setRole(payload.role);
         localStorage.setItem("token", data.access_token);
+        localStorage.setItem("refresh_token", data.refresh_token);
         localStorage.setItem("role", payload.role);
     };
 
     const logout = () => {
+        const refresh_token = localStorage.getItem("refresh_token");
+        if (refresh_token) {
+            api.post("/auth/logout", { refresh_token }).catch(console.error);
+        }
         setToken(null);
         setRole(null);
         localStorage.removeItem("token");
+        localStorage.removeItem("refresh_token");
         localStorage.removeItem("role");
     };
 
@@ -5,9 +5,17 @@ interface Order { id: number; product_id: number; quantity: number; status: stri
 
 export default function Orders() {
     const [orders, setOrders] = useState<Order[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+
+    // newest first, one page per call; X-Next-Cursor points at the next (older) page
+    const loadPage = async (cursor: string | null) => {
+        const res = await api.get<Order[]>("/orders", { params: cursor ? { cursor } : {} });
+        setOrders(prev => cursor ? [...prev, ...res.data] : res.data);
+        setNextCursor(res.headers["x-next-cursor"] ?? null);
+    };
 
     useEffect(() => {
-        api.get<Order[]>("/orders").then(res=> setOrders(res.data)).catch(console.error);
+        loadPage(null).catch(console.error);
     }, []);
 
     return (
@@ -21,6 +29,12 @@ export default function Orders() {
                     </li>
                 ))}
             </ul>
+            {nextCursor && (
+                <button
+                className="mt-6 border px-3 py-1 rounded"
+                onClick={() => loadPage(nextCursor)}
+                >Load more</button>
+            )}
         </div>
     );
 }
\ No newline at end of file
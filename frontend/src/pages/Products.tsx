@@ -7,10 +7,18 @@ interface Product { id: number; name: string; price: number;}
 
 export default function Products() {
     const [products, setProducts] = useState<Product[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const { role } = useAuth();
 
+    // the gateway returns one page per call; X-Next-Cursor points at the next one
+    const loadPage = async (cursor: string | null) => {
+        const res = await api.get<Product[]>("/products", { params: cursor ? { cursor } : {} });
+        setProducts(prev => cursor ? [...prev, ...res.data] : res.data);
+        setNextCursor(res.headers["x-next-cursor"] ?? null);
+    };
+
     useEffect(() => {
-        api.get<Product[]>("/products").then(res => setProducts(res.data));
+        loadPage(null);
     }, []);
 
     const addProduct = async () => {
@@ -18,8 +26,7 @@ export default function Products() {
         const price = prompt("Price?");
         if (!name || !price) return;
         await api.post("/products", { name, price: Number(price) });
-        const res = await api.get<Product[]>("/products");
-        setProducts(res.data);
+        await loadPage(null);
     };
 
     const buy = async (id: number) => {
@@ -55,7 +62,12 @@ export default function Products() {
                     </div>    
                 ))}
             </div>
-            
+            {nextCursor && (
+                <button
+                className="mt-6 border px-3 py-1 rounded"
+                onClick={() => loadPage(nextCursor)}
+                >Load more</button>
+            )}
         </div>
     );
 }
\ No newline at end of file
@@ -1,21 +1,96 @@
+import atexit
 import logging
 import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
 import requests
+from requests.adapters import HTTPAdapter
 
-from flask import Flask, jsonify, abort, request, Response
+from flask import Flask, jsonify, abort, request, Response, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
-from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from werkzeug.exceptions import ServiceUnavailable
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST, multiprocess
 
 # catalog service url
 CATALOG_HOST = os.getenv("CATALOG_HOST", "127.0.0.1")
 CATALOG_PORT = os.getenv("CATALOG_PORT", "5001")
 CATALOG_BASE = f"http://{CATALOG_HOST}:{CATALOG_PORT}/catalog"
 
+## endpoint is the url rule (/order/<int:order_idx>), never the raw path
 REQUEST_COUNT = Counter("order_requests_total", "Total requests to order", ["method", "endpoint", "http_status"])
+REQUEST_LATENCY = Histogram("order_request_duration_seconds", "Order request latency", ["method", "endpoint"])
 
 
 app = Flask(__name__)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(request_id)s] %(message)s")
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+## Request tracing: every request carries an id (the gateway's X-Request-ID, or a new one) that is
+## logged and echoed back; the time spent in the handler, the database and catalog-service calls is returned
+## as a Server-Timing header
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+@app.before_request
+def start_trace():
+    request_id = request.headers.get("X-Request-ID", "")
+    g.request_id = request_id if REQUEST_ID_PATTERN.fullmatch(request_id) else uuid.uuid4().hex
+    g.spans = []
+
+def add_span(name, seconds):
+    # no-op outside a request (e.g. the order writer threads)
+    if has_request_context() and "spans" in g:
+        g.spans.append((name, seconds))
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - start)
+
+def server_timing(spans):
+    """[(name, seconds)] -> "handler;dur=4.2, db;dur=1.3;desc=\"3 calls\"" (repeated names summed)."""
+    totals = {}
+    for name, seconds in spans:
+        total, calls = totals.get(name, (0.0, 0))
+        totals[name] = (total + seconds, calls + 1)
+    return ", ".join(
+        f"{name};dur={total * 1000:.1f}" + (f';desc="{calls} calls"' if calls > 1 else "")
+        for name, (total, calls) in totals.items()
+    )
+
+@app.after_request
+def finish_trace(response):
+    if "spans" in g:
+        add_span("handler", time.perf_counter() - g.request_start)
+        response.headers["X-Request-ID"] = g.request_id
+        response.headers["Server-Timing"] = server_timing(g.spans)
+    return response
+
+_make_log_record = logging.getLogRecordFactory()
+
+def _log_record_with_request_id(*args, **kwargs):
+    record = _make_log_record(*args, **kwargs)
+    if has_request_context() and "request_id" in g:
+        record.request_id = g.request_id
+    elif not hasattr(record, "request_id"):
+        record.request_id = "-"
+    return record
+
+logging.setLogRecordFactory(_log_record_with_request_id)
 
 @app.before_request
 def log_request():
@@ -26,14 +101,26 @@ def log_response(response):
     app.logger.info(f"<- {request.method} {request.path} {response.status_code}")
     return response
 
+def route_template():
+    # unmatched paths (404s) share one label instead of one series per path
+    return request.url_rule.rule if request.url_rule else "<unmatched>"
+
 @app.after_request
 def after_request(response):
-    REQUEST_COUNT.labels(request.method, request.path, response.status_code).inc()
+    endpoint = route_template()
+    REQUEST_COUNT.labels(request.method, endpoint, response.status_code).inc()
+    if "request_start" in g:
+        REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - g.request_start)
     return response
 
 @app.route('/metrics')
 def metrics():
-    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # under gunicorn every worker writes its own files there; sum them on each scrape
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
 
 @app.get('/health')
 def health():
@@ -43,18 +130,81 @@ def health():
 db_path = os.getenv("DB_PATH", "sqlite:////data/orders.db")  # still works outside Docker
 db_url = os.getenv("DATABASE_URL", db_path)
 app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+## Connection pool (per worker process): DB_POOL_SIZE kept open, up to DB_MAX_OVERFLOW more under
+## load; a request waits DB_POOL_TIMEOUT seconds for a free connection before it fails with 503
+## Unlabeled multiprocess gauges open their file in PROMETHEUS_MULTIPROC_DIR as soon as they are
+## created, and alembic's env.py imports this module before anything else has made the directory
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+DB_POOL_IN_USE = Gauge("order_db_pool_connections_in_use", "Database connections checked out of the pool", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("order_db_pool_overflow", "Open database connections beyond DB_POOL_SIZE", multiprocess_mode="livesum")
+DB_POOL_CHECKOUT_WAIT = Histogram("order_db_pool_checkout_wait_seconds", "Time spent getting a connection from the pool")
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that times every checkout and reports its overflow.
+
+    Pool events only fire once a connection has been handed out, so the
+    wait (queueing for a free connection, or opening a new one) is timed here.
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+            DB_POOL_OVERFLOW.set(max(0, self.overflow()))
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        DB_POOL_OVERFLOW.set(max(0, self.overflow()))
+
+@event.listens_for(TimedQueuePool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+@event.listens_for(TimedQueuePool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "poolclass": TimedQueuePool,
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),  # reconnect before server-side idle timeouts
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",  # drop dead connections at checkout
+}
 db = SQLAlchemy(app)
 
+@app.errorhandler(PoolTimeoutError)
+def db_pool_timeout(e):
+    return ServiceUnavailable(description="No free database connection, retry shortly", retry_after=1).get_response()
+
+## Statement time for Server-Timing ("db" span)
+with app.app_context():
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+    @event.listens_for(db.engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        add_span("db", time.perf_counter() - conn.info["statement_start"].pop())
+
 # # In-memory storage for orders
 # orders = []
 
 ## Creating an Order model
 class Order(db.Model):
+    __table_args__ = (
+        db.Index("ix_order_username_id", "username", "id"),  # migration 5b7e2c91d4a0
+        db.Index("ix_order_tracking_id", "tracking_id", unique=True),  # migration 0d8f3a6c27e1
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String, nullable=False)
     product_id = db.Column(db.Integer, nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), nullable=False, default="created")
+    tracking_id = db.Column(db.String(32), nullable=True)  # set on orders accepted with 202 (async mode)
 
     def as_dict(self):
         return {
@@ -62,27 +212,421 @@ class Order(db.Model):
             'username': self.username,
             'product_id': self.product_id,
             'quantity': self.quantity,
-            'status': self.status
+            'status': self.status,
+            'tracking_id': self.tracking_id
         }
 
 ## create database if it dosen;t exist
 # with app.app_context():
 #     db.create_all()
 
+## Catalog calls: one pooled session per worker, so orders reuse keep-alive connections
+CATALOG_CONNECT_TIMEOUT = float(os.getenv("CATALOG_CONNECT_TIMEOUT", 1))
+CATALOG_READ_TIMEOUT = float(os.getenv("CATALOG_READ_TIMEOUT", 3))
+CATALOG_POOL_SIZE = int(os.getenv("CATALOG_POOL_SIZE", 10))  # >= gunicorn threads per worker
+
+class TracedAdapter(HTTPAdapter):
+    """Forwards the request's X-Request-ID to catalog-service and records the call as a "catalog"
+    span, followed by catalog-service's own Server-Timing entries as "catalog.<name>" spans."""
+
+    def send(self, request, **kwargs):
+        if has_request_context() and "request_id" in g:
+            request.headers["X-Request-ID"] = g.request_id
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            add_span("catalog", time.perf_counter() - start)
+        for name, seconds in parse_server_timing(response.headers.get("Server-Timing", "")):
+            add_span(f"catalog.{name}", seconds)
+        return response
+
+def parse_server_timing(header):
+    """'db;dur=1.3;desc="x", handler;dur=4.2' -> [("db", 0.0013), ("handler", 0.0042)]"""
+    spans = []
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, *params = (param.strip() for param in entry.split(";"))
+        durations = [param[4:] for param in params if param.startswith("dur=")]
+        try:
+            spans.append((name, float(durations[0]) / 1000))
+        except (IndexError, ValueError):
+            continue
+    return spans
+
+catalog_session = requests.Session()
+catalog_session.mount("http://", TracedAdapter(pool_connections=1, pool_maxsize=CATALOG_POOL_SIZE))
+catalog_session.mount("https://", TracedAdapter(pool_connections=1, pool_maxsize=CATALOG_POOL_SIZE))
+
+CATALOG_CALL_LATENCY = Histogram("order_catalog_request_duration_seconds", "Latency of product checks against catalog-service", ["outcome"])
+PRODUCT_CACHE_REQUESTS = Counter("order_product_cache_requests_total", "Product existence checks by cache result (hit rate = hit / all)", ["result"])
+
+## Product existence cache: found products for PRODUCT_CACHE_TTL, unknown ids (404) for the
+## shorter PRODUCT_CACHE_NEGATIVE_TTL so a newly added product is orderable soon after
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", 60))
+PRODUCT_CACHE_NEGATIVE_TTL = float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", 5))
+PRODUCT_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", 10_000))
+
+class ProductCache:
+    """Bounded LRU of product_id -> exists, with per-entry expiry. Shared by a worker's threads."""
+
+    def __init__(self, max_entries, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # product_id -> (expires_at, exists)
+        self._lock = threading.Lock()
+
+    def get(self, product_id):
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop(product_id, None)
+                return None
+            self._entries.move_to_end(product_id)
+            return entry[1]
+
+    def set(self, product_id, exists, ttl):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[product_id] = (self.clock() + ttl, exists)
+            self._entries.move_to_end(product_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+product_cache = ProductCache(PRODUCT_CACHE_MAX_ENTRIES)
+
+def product_exists(product_id):
+    exists = product_cache.get(product_id)
+    if exists is not None:
+        PRODUCT_CACHE_REQUESTS.labels("hit").inc()
+        return exists
+    PRODUCT_CACHE_REQUESTS.labels("miss").inc()
+
+    start = time.perf_counter()
+    try:
+        response = catalog_session.get(f"{CATALOG_BASE}/{product_id}",
+                                       timeout=(CATALOG_CONNECT_TIMEOUT, CATALOG_READ_TIMEOUT))
+    except requests.RequestException as e:
+        CATALOG_CALL_LATENCY.labels("error").observe(time.perf_counter() - start)
+        app.logger.warning(f"catalog check for product {product_id} failed: {e}")
+        abort(503, description="Catalog service unavailable")
+    outcome = {200: "found", 404: "not_found"}.get(response.status_code, "error")
+    CATALOG_CALL_LATENCY.labels(outcome).observe(time.perf_counter() - start)
+    if outcome == "error":
+        # not an answer about the product: don't cache it
+        abort(503, description=f"Catalog service returned {response.status_code}")
+
+    exists = outcome == "found"
+    product_cache.set(product_id, exists, PRODUCT_CACHE_TTL if exists else PRODUCT_CACHE_NEGATIVE_TTL)
+    return exists
+
+def products_exist(product_ids):
+    """{product_id: exists} for many ids: cache first, then one POST /catalog/lookup for the rest."""
+    result, misses = {}, []
+    for product_id in dict.fromkeys(product_ids):
+        exists = product_cache.get(product_id)
+        PRODUCT_CACHE_REQUESTS.labels("miss" if exists is None else "hit").inc()
+        if exists is None:
+            misses.append(product_id)
+        else:
+            result[product_id] = exists
+    if not misses:
+        return result
+
+    start = time.perf_counter()
+    try:
+        response = catalog_session.post(f"{CATALOG_BASE}/lookup", json={"ids": misses},
+                                        timeout=(CATALOG_CONNECT_TIMEOUT, CATALOG_READ_TIMEOUT))
+        response.raise_for_status()
+        found = {p["id"] for p in response.json()["products"]}
+    except (requests.RequestException, ValueError, KeyError) as e:
+        CATALOG_CALL_LATENCY.labels("error").observe(time.perf_counter() - start)
+        app.logger.warning(f"catalog lookup for {len(misses)} products failed: {e}")
+        abort(503, description="Catalog service unavailable")
+    CATALOG_CALL_LATENCY.labels("lookup").observe(time.perf_counter() - start)
+
+    for product_id in misses:
+        exists = product_id in found
+        product_cache.set(product_id, exists, PRODUCT_CACHE_TTL if exists else PRODUCT_CACHE_NEGATIVE_TTL)
+        result[product_id] = exists
+    return result
+
+def is_positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+## Write-behind order pipeline (ORDER_ACCEPT_MODE=async)
+## POST /order only validates the payload, enqueues it and answers 202 "pending" with a tracking_id
+## (GET /order/tracking/<tracking_id> shows the order once it is written). Writer threads
+## take batches off the queue, check all their products with one catalog lookup and commit the
+## batch in one transaction as "created" / "rejected" orders. A full queue answers 503.
+ORDER_ACCEPT_MODE = os.getenv("ORDER_ACCEPT_MODE", "sync")
+ORDER_QUEUE = os.getenv("ORDER_QUEUE", "memory")  # or sqlite:///path/to/queue.db (survives restarts)
+ORDER_QUEUE_MAX_ITEMS = int(os.getenv("ORDER_QUEUE_MAX_ITEMS", 10_000))
+ORDER_WRITERS = int(os.getenv("ORDER_WRITERS", 2))
+ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", 200))
+ORDER_BATCH_LINGER = float(os.getenv("ORDER_BATCH_LINGER", 0.02))  # wait this long for a batch to fill up
+
+## depth: read from the queue after every enqueue and written batch. A memory queue belongs to one
+## worker (summed over live workers); a SQLite queue is shared, so the latest reading is the total
+ORDER_QUEUE_DEPTH = Gauge("order_queue_depth", "Accepted orders not yet written",
+                          multiprocess_mode="livesum" if ORDER_QUEUE == "memory" else "livemostrecent")
+ORDER_QUEUE_FULL = Counter("order_queue_full_total", "Orders refused with 503 because the queue was full")
+ORDER_BATCH_SIZE_HIST = Histogram("order_write_batch_size", "Orders per write-behind commit", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+ORDER_QUEUE_WAIT = Histogram("order_queue_wait_seconds", "Time from 202 to the order's commit")
+ORDERS_WRITTEN = Counter("order_write_behind_orders_total", "Orders written by the write-behind pipeline", ["status"])
+
+class QueueFull(Exception):
+    pass
+
+class InMemoryOrderQueue:
+    """Bounded per-process queue. Orders still queued when the process dies are lost,
+    so writers drain it on shutdown (see OrderWriters.stop)."""
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.max_items:
+                raise QueueFull
+            self._items.append(item)
+            self._cond.notify()
+
+    def get_batch(self, max_items, timeout, linger=0.0):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return []
+            if linger:
+                self._cond.wait_for(lambda: len(self._items) >= max_items, linger)
+            return [self._items.popleft() for _ in range(min(max_items, len(self._items)))]
+
+    def release(self, items):
+        # back to the front, to be retried first
+        with self._cond:
+            self._items.extendleft(reversed(items))
+            self._cond.notify()
+
+    def ack(self, items):
+        pass
+
+class SQLiteOrderQueue:
+    """Bounded queue in a local SQLite file, shared by every worker process on the host.
+
+    A batch is claimed with a lease and deleted once its orders are committed; if a writer
+    dies in between, the lease runs out and another writer picks the batch up again. Delivery
+    is at-least-once; write_batch skips tracking ids that were already committed.
+    """
+
+    def __init__(self, path, max_items, lease=60.0, poll_interval=0.05):
+        self.path = path
+        self.max_items = max_items
+        self.lease = lease
+        self.poll_interval = poll_interval
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending_order ("
+                " id INTEGER PRIMARY KEY, username TEXT NOT NULL, product_id INTEGER NOT NULL,"
+                " quantity INTEGER NOT NULL, enqueued_at REAL NOT NULL, claimed_at REAL, tracking_id TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(pending_order)")}
+            if "tracking_id" not in columns:  # queue file from before tracking ids
+                conn.execute("ALTER TABLE pending_order ADD COLUMN tracking_id TEXT")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM pending_order").fetchone()[0]
+
+    def put(self, item):
+        with self._connect() as conn:
+            inserted = conn.execute(
+                "INSERT INTO pending_order (username, product_id, quantity, enqueued_at, tracking_id)"
+                " SELECT ?, ?, ?, ?, ? WHERE (SELECT count(*) FROM pending_order) < ?",
+                (item["username"], item["product_id"], item["quantity"], item["enqueued_at"],
+                 item.get("tracking_id"), self.max_items),
+            ).rowcount
+        if not inserted:
+            raise QueueFull
+
+    def _claim(self, max_items):
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "UPDATE pending_order SET claimed_at = ? WHERE id IN ("
+                " SELECT id FROM pending_order WHERE claimed_at IS NULL OR claimed_at < ?"
+                " ORDER BY id LIMIT ?)"
+                " RETURNING id, username, product_id, quantity, enqueued_at, tracking_id",
+                (now, now - self.lease, max_items),
+            ).fetchall()
+        keys = ("id", "username", "product_id", "quantity", "enqueued_at", "tracking_id")
+        return sorted((dict(zip(keys, row)) for row in rows), key=lambda item: item["id"])
+
+    def get_batch(self, max_items, timeout, linger=0.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            batch = self._claim(max_items)
+            if batch:
+                if linger and len(batch) < max_items:
+                    time.sleep(linger)
+                    batch += self._claim(max_items - len(batch))
+                return batch
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(self.poll_interval)
+
+    def _update(self, sql, items):
+        ids = [item["id"] for item in items]
+        with self._connect() as conn:
+            conn.execute(sql.format(",".join("?" * len(ids))), ids)
+
+    def release(self, items):
+        self._update("UPDATE pending_order SET claimed_at = NULL WHERE id IN ({})", items)
+
+    def ack(self, items):
+        self._update("DELETE FROM pending_order WHERE id IN ({})", items)
+
+def make_order_queue(url, max_items):
+    if url == "memory":
+        return InMemoryOrderQueue(max_items)
+    if url.startswith("sqlite:///"):
+        return SQLiteOrderQueue(url.removeprefix("sqlite:///"), max_items)
+    raise ValueError(f"ORDER_QUEUE must be 'memory' or 'sqlite:///path', not {url!r}")
+
+order_queue = make_order_queue(ORDER_QUEUE, ORDER_QUEUE_MAX_ITEMS)
+ORDER_QUEUE_DEPTH.set(len(order_queue))
+
+def write_batch(batch):
+    """Check and commit one batch (one catalog lookup, one transaction)."""
+    # a batch redelivered after a crash (SQLite queue) may already be committed
+    tracking_ids = [item["tracking_id"] for item in batch if item.get("tracking_id")]
+    written = set(db.session.execute(
+        db.select(Order.tracking_id).where(Order.tracking_id.in_(tracking_ids))
+    ).scalars()) if tracking_ids else set()
+    batch = [item for item in batch if not item.get("tracking_id") or item["tracking_id"] not in written]
+    if not batch:
+        return
+    exists = products_exist([item["product_id"] for item in batch])
+    orders = [
+        Order(username=item["username"], product_id=item["product_id"], quantity=item["quantity"],
+              status="created" if exists[item["product_id"]] else "rejected",
+              tracking_id=item.get("tracking_id"))
+        for item in batch
+    ]
+    db.session.add_all(orders)
+    db.session.commit()
+    now = time.time()
+    for item, order in zip(batch, orders):
+        ORDER_QUEUE_WAIT.observe(now - item["enqueued_at"])
+        ORDERS_WRITTEN.labels(order.status).inc()
+    ORDER_BATCH_SIZE_HIST.observe(len(batch))
+
+class OrderWriters:
+    """The writer threads of one worker process. Started on the first async order, or by
+    start_order_writers when the worker starts with orders already queued."""
+
+    def __init__(self, queue, count):
+        self.queue = queue
+        self.count = count
+        self.threads = []
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self.threads:
+            return
+        with self._lock:
+            if not self.threads:
+                self.threads = [threading.Thread(target=self._run, name=f"order-writer-{i}", daemon=True)
+                                for i in range(self.count)]
+                for thread in self.threads:
+                    thread.start()
+                # gunicorn workers exit normally on SIGTERM, so this runs inside the graceful timeout
+                atexit.register(self.stop)
+
+    def _run(self):
+        backoff = 0.5
+        with app.app_context():
+            while True:
+                # once stopping, keep going until the queue is drained
+                batch = self.queue.get_batch(ORDER_BATCH_SIZE, timeout=0.2, linger=ORDER_BATCH_LINGER)
+                if not batch:
+                    if self.stopping.is_set():
+                        return
+                    continue
+                try:
+                    write_batch(batch)
+                except Exception as e:  # incl. the 503 products_exist raises while the catalog is down
+                    db.session.rollback()
+                    self.queue.release(batch)
+                    app.logger.warning(f"order batch of {len(batch)} failed, retrying in {backoff}s: {e}")
+                    if self.stopping.wait(backoff):
+                        return  # shutting down with the catalog unreachable; the batch stays queued
+                    backoff = min(backoff * 2, 5.0)
+                    continue
+                self.queue.ack(batch)
+                ORDER_QUEUE_DEPTH.set(len(self.queue))
+                backoff = 0.5
+
+    def stop(self, timeout=10.0):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+order_writers = OrderWriters(order_queue, ORDER_WRITERS)
+
+def start_order_writers():
+    """Write the orders a previous run left in a persistent queue now, not on the next async order.
+
+    Called once per serving process (gunicorn's post_worker_init, the dev server), never at
+    import: alembic's env.py imports this module too, maybe before the schema is migrated.
+    """
+    if len(order_queue):
+        order_writers.ensure_started()
+
+def enqueue_order(username, product_id, quantity):
+    item = {"username": username, "product_id": product_id, "quantity": quantity, "enqueued_at": time.time(),
+            "tracking_id": uuid.uuid4().hex}
+    try:
+        order_queue.put(item)
+    except QueueFull:
+        ORDER_QUEUE_FULL.inc()
+        abort(503, description="Order queue is full, retry shortly", retry_after=1)
+    ORDER_QUEUE_DEPTH.set(len(order_queue))
+    order_writers.ensure_started()
+    return jsonify({"username": username, "product_id": product_id, "quantity": quantity, "status": "pending",
+                    "tracking_id": item["tracking_id"]}), 202
+
 # POST a new order
 @app.route('/order', methods=['POST'])
 def create_order():
     if not request.json or 'product_id' not in request.json or 'quantity' not in request.json:
         abort(400, description="Missing order data")
     
-    product_id = request.json['product_id']    
-    # calling catalog service to check if the product exists
-    catalog_url = f'{CATALOG_BASE}/{product_id}'
-    response = requests.get(catalog_url)
-    if response.status_code != 200:
+    product_id = request.json['product_id']
+    if not isinstance(product_id, int) or isinstance(product_id, bool):
+        abort(400, description="product_id must be an integer")
+    if ORDER_ACCEPT_MODE == "async":
+        username = request.headers.get("X-User")
+        if not username:
+            abort(400, description="Missing X-User header")
+        if not is_positive_int(product_id) or not is_positive_int(request.json['quantity']):
+            abort(400, description="product_id and quantity must be positive integers")
+        return enqueue_order(username, product_id, request.json['quantity'])
+    # calling catalog service (or the product cache) to check if the product exists
+    if not product_exists(product_id):
         abort(404, description="Product not found in catalog")
-    else:
-        print(f"{product_id} found in catalog service")
 
     ## Create and add ordert to the database
     username = request.headers.get("X-User")
@@ -94,25 +638,114 @@ def create_order():
         quantity=request.json['quantity'], 
         status="created")
     db.session.add(new_order)
-    db.session.commit()
+    with span("commit"):
+        db.session.commit()
 
     return jsonify(new_order.as_dict()), 201
 
-# GET an order by id
+## POST /orders/bulk: a whole cart in one call
+## {"items": [{"product_id": 1, "quantity": 2}, ...]} -> one catalog lookup, one commit.
+## Every item gets its own result, in request order; items that fail validation are reported
+## and the valid ones are still placed.
+ORDER_BULK_MAX_ITEMS = int(os.getenv("ORDER_BULK_MAX_ITEMS", 100))
+
+@app.route('/orders/bulk', methods=['POST'])
+def create_orders_bulk():
+    username = request.headers.get("X-User")
+    if not username:
+        abort(400, description="Missing X-User header")
+    items = (request.get_json(silent=True) or {}).get("items")
+    if not isinstance(items, list) or not items:
+        abort(400, description="items is required")
+    if len(items) > ORDER_BULK_MAX_ITEMS:
+        abort(400, description=f"At most {ORDER_BULK_MAX_ITEMS} items per bulk order")
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not is_positive_int(item.get("product_id")) \
+                or not is_positive_int(item.get("quantity")):
+            results[index] = {"status": 400, "body": {"detail": "product_id and quantity must be positive integers"}}
+        else:
+            valid.append((index, item))
+
+    exists = products_exist([item["product_id"] for _, item in valid]) if valid else {}
+    placed = []
+    for index, item in valid:
+        if not exists[item["product_id"]]:
+            results[index] = {"status": 404, "body": {"detail": "Product not found in catalog"}}
+            continue
+        order = Order(username=username, product_id=item["product_id"], quantity=item["quantity"], status="created")
+        placed.append((index, order))
+    db.session.add_all([order for _, order in placed])
+    with span("commit"):
+        db.session.commit()
+
+    for index, order in placed:
+        results[index] = {"status": 201, "body": order.as_dict()}
+    return jsonify({"results": results})
+
+# GET an order by id; only its owner (X-User) sees it, anyone else gets the same 404 as a missing id
 @app.route('/order/<int:order_idx>', methods=['GET'])
 def get_order(order_idx: int):
-    order = Order.query.get(order_idx)
+    username = request.headers.get("X-User")
+    if not username:
+        abort(400, description="Missing X-User header")
+    order = db.session.execute(
+        db.select(Order).where(Order.id == order_idx, Order.username == username)
+    ).scalar_one_or_none()
     if order is None:
         abort(404, description="Order not found")
     return jsonify(order.as_dict())
 
+# GET an order accepted with 202 by its tracking id: 200 with its status ("created" / "rejected")
+# once written; 404 while it is still queued (or the id is unknown, or someone else's)
+@app.route('/order/tracking/<tracking_id>', methods=['GET'])
+def get_order_by_tracking_id(tracking_id):
+    username = request.headers.get("X-User")
+    if not username:
+        abort(400, description="Missing X-User header")
+    order = db.session.execute(
+        db.select(Order).where(Order.tracking_id == tracking_id, Order.username == username)
+    ).scalar_one_or_none()
+    if order is None:
+        abort(404, description="Order not written yet")
+    return jsonify(order.as_dict())
+
+## Keyset pagination for GET /orders, newest first
+ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", 50))
+ORDERS_MAX_PAGE_SIZE = int(os.getenv("ORDERS_MAX_PAGE_SIZE", 500))
+
+def page_args():
+    """Read ?limit=&cursor= ; the cursor is the id of the last (oldest) order already seen."""
+    try:
+        limit = int(request.args.get("limit", ORDERS_PAGE_SIZE))
+        cursor = request.args.get("cursor")
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        abort(400, description="limit and cursor must be integers")
+    if not 0 < limit <= ORDERS_MAX_PAGE_SIZE:
+        abort(400, description=f"limit must be between 1 and {ORDERS_MAX_PAGE_SIZE}")
+    return limit, cursor
+
+## GET one user's orders, one page at a time (id < cursor, ordered by id descending)
 @app.route("/orders", methods=['GET'])
 def list_orders():
     username = request.headers.get("X-User")
     if not username:
         abort(400, description="Missing X-User header")
-    user_orders = Order.query.filter_by(username=username).all()
-    return jsonify([o.as_dict() for o in user_orders])
+    limit, cursor = page_args()
+    # served by ix_order_username_id; one extra row tells us whether there is a next page
+    query = db.select(Order).where(Order.username == username)
+    if cursor is not None:
+        query = query.where(Order.id < cursor)
+    rows = db.session.execute(query.order_by(Order.id.desc()).limit(limit + 1)).scalars().all()
+    response = jsonify([o.as_dict() for o in rows[:limit]])
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = str(rows[limit - 1].id)
+    return response
 
 if __name__=="__main__":
+    if os.environ.get("WERKZEUG_RUN_MAIN"):  # the reloader's serving process, not its file watcher
+        start_order_writers()
     app.run(host="0.0.0.0", port=5002, debug=True)
@@ -0,0 +1,33 @@
+"""Production serving for order-service: `gunicorn -c gunicorn.conf.py app:app` (see entrypoint.sh).
+
+Pre-fork workers, each with a small thread pool. The app is imported
+in every worker after the fork (no preload), so no database
+connection is ever shared across processes.
+"""
+import multiprocessing
+import os
+
+from prometheus_client import multiprocess
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5002')}"
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.getenv("WEB_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.getenv("WEB_TIMEOUT", 30))
+# on SIGTERM workers stop accepting and get this long to finish in-flight requests
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 20))
+keepalive = 5
+accesslog = None  # the app logs every request itself
+
+
+def child_exit(server, worker):
+    # drop the dead worker's live gauge values from /metrics; its counters are kept
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # the worker has imported app by now; its writers start here rather than at import
+    from app import start_order_writers
+
+    start_order_writers()
@@ -0,0 +1,28 @@
+"""add order tracking_id
+
+Revision ID: 0d8f3a6c27e1
+Revises: 5b7e2c91d4a0
+Create Date: 2026-10-18 16:40:27.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d8f3a6c27e1'
+down_revision = '5b7e2c91d4a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # returned with 202 by the write-behind pipeline; unique so a redelivered order is written once
+    op.add_column('order', sa.Column('tracking_id', sa.String(length=32), nullable=True))
+    op.create_index('ix_order_tracking_id', 'order', ['tracking_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_tracking_id', table_name='order')
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('tracking_id')
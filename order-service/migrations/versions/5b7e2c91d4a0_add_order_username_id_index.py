@@ -0,0 +1,25 @@
+"""add order (username, id) index
+
+Revision ID: 5b7e2c91d4a0
+Revises: 941d41f2baa8
+Create Date: 2026-10-18 14:05:12.318840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c91d4a0'
+down_revision = '941d41f2baa8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # one user's orders, already in id order: GET /orders pages are a short index range scan
+    op.create_index('ix_order_username_id', 'order', ['username', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_username_id', table_name='order')
@@ -0,0 +1,205 @@
+import asyncio, importlib.util, inspect, os, pathlib, sys
+
+import httpx
+import pytest
+import requests
+
+
+repo_root = pathlib.Path(__file__).resolve().parents[1]
+gateway_dir = repo_root / "api-gateway"
+sys.path.append(str(gateway_dir))
+
+
+def load_flask_service(service: str, module_name: str, db_file: pathlib.Path):
+    """Import <service>/app.py under a unique module name against a throwaway SQLite file.
+
+    Both Flask services live in a file called app.py, so they cannot be
+    imported by name side by side.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, repo_root / service / "app.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL")
+        else:
+            os.environ["DATABASE_URL"] = previous
+    with module.app.app_context():
+        module.db.create_all()
+    return module
+
+
+@pytest.fixture(scope="session")
+def catalog_service(tmp_path_factory):
+    return load_flask_service("catalog-service", "catalog_app", tmp_path_factory.mktemp("catalog") / "catalog.db")
+
+
+@pytest.fixture(scope="session")
+def order_service(tmp_path_factory):
+    return load_flask_service("order-service", "order_app", tmp_path_factory.mktemp("order") / "orders.db")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """A monotonic clock for the gateway's clock= hooks that only moves when the test sets `.now`."""
+    return FakeClock()
+
+
+class FakeCatalog:
+    """catalog-service as order-service's `catalog_session` sees it.
+
+    GET /catalog/<id> answers 200 or 404 from `known`, POST /catalog/lookup returns the known
+    ids of those asked for. `fail` makes every call raise, `failures` the next that many.
+    """
+
+    def __init__(self, known, failures=0):
+        self.known = set(known)
+        self.failures = failures
+        self.fail = False
+        self.calls = []  # GET urls
+        self.lookups = []  # POSTed id lists
+
+    def _maybe_fail(self):
+        if self.failures:
+            self.failures -= 1
+            raise requests.ConnectionError("catalog down")
+        if self.fail:
+            raise requests.ConnectionError("catalog down")
+
+    def get(self, url, timeout=None):
+        assert timeout is not None
+        self.calls.append(url)
+        self._maybe_fail()
+        response = requests.Response()
+        response.status_code = 200 if int(url.rsplit("/", 1)[1]) in self.known else 404
+        return response
+
+    def post(self, url, json=None, timeout=None):
+        assert url.endswith("/catalog/lookup") and timeout is not None
+        self.lookups.append(json["ids"])
+        self._maybe_fail()
+        response = requests.Response()
+        response.status_code = 200
+        response._content = ('{"products": [%s], "missing": [%s]}' % (
+            ",".join(f'{{"id": {i}, "name": "p", "price": 1}}' for i in json["ids"] if i in self.known),
+            ",".join(str(i) for i in json["ids"] if i not in self.known),
+        )).encode()
+        return response
+
+
+@pytest.fixture
+def catalog(order_service, monkeypatch, request):
+    """Answer order-service's catalog calls with a FakeCatalog knowing product 1, or the ids
+    given by indirect parametrization: @pytest.mark.parametrize("catalog", [{1, 2}], indirect=True)."""
+    fake = FakeCatalog(known=getattr(request, "param", {1}))
+    monkeypatch.setattr(order_service.catalog_session, "get", fake.get)
+    monkeypatch.setattr(order_service.catalog_session, "post", fake.post)
+    order_service.product_cache.clear()
+    yield fake
+    order_service.product_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def auth_service(tmp_path_factory):
+    """auth-service/main.py (FastAPI) imported as auth_main, on a throwaway SQLite file.
+
+    Cheap bcrypt rounds and one hash process keep the tests fast; the
+    settings stay in the environment so the spawned pool process sees them too.
+    """
+    if "auth_main" in sys.modules:
+        return sys.modules["auth_main"]
+    db_file = tmp_path_factory.mktemp("auth") / "users.db"
+    os.environ.update({"BCRYPT_ROUNDS": "4", "HASH_WORKERS": "1"})
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    sys.path.append(str(repo_root / "auth-service"))  # for `import hashing`; after api-gateway, so `main` stays the gateway
+    try:
+        spec = importlib.util.spec_from_file_location("auth_main", repo_root / "auth-service" / "main.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["auth_main"] = module
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL")
+        else:
+            os.environ["DATABASE_URL"] = previous
+    return module
+
+
+@pytest.fixture
+def mock_upstream():
+    """Route one gateway upstream (catalog/order/auth) through an httpx.MockTransport handler."""
+    import main
+
+    swapped = []
+
+    def install(name, handler):
+        async def unread(request):
+            # httpx.Response(json=...) comes back pre-read; real upstreams hand over an unread stream
+            response = handler(request)
+            if inspect.isawaitable(response):
+                response = await response
+            return httpx.Response(response.status_code, headers=response.headers, stream=httpx.ByteStream(response.content))
+
+        upstream = main.upstreams[name]
+        asyncio.run(upstream.close())
+        upstream.transport = httpx.MockTransport(unread)
+        upstream.breaker = fresh_breaker(upstream)
+        swapped.append(upstream)
+        return upstream
+
+    yield install
+
+    for upstream in swapped:
+        asyncio.run(upstream.close())
+        upstream.transport = None
+        upstream.breaker = fresh_breaker(upstream)
+
+
+def fresh_breaker(upstream):
+    from breaker import CircuitBreaker
+
+    return CircuitBreaker(
+        upstream.name,
+        failure_threshold=upstream.config.circuit_failure_threshold,
+        reset_timeout=upstream.config.circuit_reset_timeout,
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_gateway_caches():
+    import main
+
+    main.products_cache.invalidate()
+    main.jwt_cache.invalidate()
+    main.rate_limit_store.clear()
+    yield
+
+
+@pytest.fixture
+def auth_header():
+    """Build an Authorization header carrying a gateway-signed JWT."""
+    import datetime
+    from jose import jwt
+    import main
+
+    def make(username="bob", role="user", minutes=60):
+        exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=minutes)
+        token = jwt.encode({"sub": username, "role": role, "exp": exp}, main.JWT_SECRET, algorithm=main.ALGORITHM)
+        return {"Authorization": f"Bearer {token}"}
+
+    return make
@@ -0,0 +1,80 @@
+from fastapi.testclient import TestClient
+
+
+def test_register_and_login_hash_in_the_pool(auth_service):
+    with TestClient(auth_service.app) as client:
+        assert client.post("/register", json={"username": "pooled", "password": "pw"}).status_code == 201
+        r = client.post("/login", json={"username": "pooled", "password": "pw"})
+        assert r.status_code == 200 and r.json()["access_token"]
+        assert client.post("/login", json={"username": "pooled", "password": "nope"}).status_code == 401
+
+        metrics = client.get("/metrics").text
+        assert 'auth_hash_duration_seconds_count{op="hash"}' in metrics
+        assert 'auth_hash_duration_seconds_count{op="verify"}' in metrics
+        assert auth_service.hash_pool.pending == 0
+
+
+def test_full_hash_pool_rejects_with_503(auth_service, monkeypatch):
+    monkeypatch.setattr(auth_service.hash_pool, "max_pending", 0)
+    with TestClient(auth_service.app) as client:
+        r = client.post("/register", json={"username": "turned-away", "password": "pw"})
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "1"
+        assert "auth_hash_rejected_total 1.0" in client.get("/metrics").text
+
+
+def test_pending_hashes_hold_no_request_threads(auth_service, monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    import anyio
+
+    class StalledExecutor:
+        """Leaves every bcrypt call pending until release()."""
+
+        def __init__(self):
+            self.futures = []
+            self.released = False
+
+        def submit(self, fn, *args):
+            future = Future()
+            if self.released:
+                future.set_result("not-a-real-hash")
+            self.futures.append(future)
+            return future
+
+        def release(self):
+            self.released = True
+            for future in self.futures:
+                if not future.done():
+                    future.set_result("not-a-real-hash")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    async def shrink_threadpool():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 2
+
+    executor = StalledExecutor()
+    monkeypatch.setattr(auth_service.hash_pool, "max_pending", 16)
+    with TestClient(auth_service.app) as client:
+        monkeypatch.setattr(auth_service.hash_pool, "_executor", executor)
+        client.portal.call(shrink_threadpool)
+        register = lambda i: client.post("/register", json={"username": f"stalled-{i}", "password": "pw"}).status_code
+        with ThreadPoolExecutor(4) as pool:
+            codes = pool.map(register, range(4))
+            try:
+                deadline = time.monotonic() + 5
+                while len(executor.futures) < 4 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert auth_service.hash_pool.pending == 4
+
+                # four hashes pending on a two-thread pool, and a sync endpoint still answers
+                answered = threading.Event()
+                threading.Thread(target=lambda: client.get("/verify", params={"token": "x"}) and answered.set(), daemon=True).start()
+                assert answered.wait(5)
+            finally:
+                executor.release()
+            assert list(codes) == [201] * 4
+        assert auth_service.hash_pool.pending == 0
@@ -0,0 +1,103 @@
+import datetime
+
+import httpx
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from main import app
+
+
+def login(client, username):
+    client.post("/register", json={"username": username, "password": "pw"})
+    r = client.post("/login", json={"username": username, "password": "pw"})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_refresh_rotates_tokens_without_bcrypt(auth_service, monkeypatch):
+    with TestClient(auth_service.app) as client:
+        tokens = login(client, "refresher")
+
+        def no_bcrypt(*args):
+            raise AssertionError("refresh must not hash")
+
+        monkeypatch.setattr(auth_service.hash_pool, "verify", no_bcrypt)
+        r = client.post("/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert r.status_code == 200
+        renewed = r.json()
+        claims = jwt.decode(renewed["access_token"], auth_service.JWT_SECRET, algorithms=[auth_service.ALGORITHM])
+        assert claims["sub"] == "refresher" and claims["role"] == "user"
+        assert renewed["refresh_token"] != tokens["refresh_token"]
+
+        # the new refresh token works in turn
+        assert client.post("/refresh", json={"refresh_token": renewed["refresh_token"]}).status_code == 200
+
+
+def test_reused_refresh_token_revokes_the_family(auth_service):
+    with TestClient(auth_service.app) as client:
+        first = login(client, "victim")["refresh_token"]
+        second = client.post("/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+        r = client.post("/refresh", json={"refresh_token": first})  # replayed
+        assert r.status_code == 401
+        assert client.post("/refresh", json={"refresh_token": second}).status_code == 401
+
+
+def test_logout_and_expiry_end_refresh(auth_service):
+    with TestClient(auth_service.app) as client:
+        token = login(client, "leaver")["refresh_token"]
+        assert client.post("/logout", json={"refresh_token": token}).status_code == 204
+        assert client.post("/refresh", json={"refresh_token": token}).status_code == 401
+        assert client.post("/refresh", json={"refresh_token": "made-up"}).status_code == 401
+
+        token = login(client, "leaver")["refresh_token"]
+        with auth_service.SessionLocal() as session:
+            stored = session.query(auth_service.RefreshToken).filter_by(
+                token_hash=auth_service.token_digest(token)).one()
+            stored.expires_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+            session.commit()
+        assert client.post("/refresh", json={"refresh_token": token}).status_code == 401
+
+
+def test_issuing_a_token_purges_the_users_expired_ones(auth_service):
+    with TestClient(auth_service.app) as client:
+        stale = login(client, "hoarder")["refresh_token"]
+        assert client.post("/logout", json={"refresh_token": stale}).status_code == 204
+        rotated = login(client, "hoarder")["refresh_token"]
+        live = client.post("/refresh", json={"refresh_token": rotated}).json()["refresh_token"]
+        other = login(client, "bystander")["refresh_token"]
+
+        with auth_service.SessionLocal() as session:
+            for token in (stale, live, other):
+                session.query(auth_service.RefreshToken).filter_by(token_hash=auth_service.token_digest(token)).one() \
+                    .expires_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+            session.commit()
+
+        login(client, "hoarder")
+
+        with auth_service.SessionLocal() as session:
+            kept = {row.token_hash for row in session.query(auth_service.RefreshToken)}
+        assert auth_service.token_digest(stale) not in kept and auth_service.token_digest(live) not in kept
+        assert auth_service.token_digest(other) in kept  # another user's rows are left to their own logins
+        # revoked but unexpired: still there, so replaying it is caught as reuse
+        assert auth_service.token_digest(rotated) in kept
+        assert client.post("/refresh", json={"refresh_token": rotated}).json()["detail"] == "Refresh token already used"
+
+
+def test_gateway_proxies_refresh_without_a_bearer_token(mock_upstream):
+    seen = []
+
+    def auth(req):
+        seen.append(req.url.path)
+        if req.url.path == "/logout":
+            return httpx.Response(204)
+        return httpx.Response(200, json={"access_token": "a", "refresh_token": "r2", "token_type": "bearer"})
+
+    mock_upstream("auth", auth)
+
+    with TestClient(app) as client:
+        r = client.post("/auth/refresh", json={"refresh_token": "r1"})
+        assert r.status_code == 200 and r.json()["refresh_token"] == "r2"
+        assert client.post("/auth/logout", json={"refresh_token": "r2"}).status_code == 204
+
+    assert seen == ["/refresh", "/logout"]
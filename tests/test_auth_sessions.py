@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+def test_concurrent_registrations_get_their_own_sessions(auth_service, monkeypatch):
+    monkeypatch.setattr(auth_service.hash_pool, "max_pending", 16)
+    with TestClient(auth_service.app) as client:
+        register = lambda _: client.post("/register", json={"username": "racer", "password": "pw"}).status_code
+        with ThreadPoolExecutor(8) as pool:
+            codes = sorted(pool.map(register, range(8)))
+        assert codes == [201] + [409] * 7
+
+        # a failed commit in one request leaves nothing behind for the next
+        assert client.post("/login", json={"username": "racer", "password": "pw"}).status_code == 200
+        assert client.post("/register", json={"username": "racer-2", "password": "pw"}).status_code == 201
+
+
+def test_pool_metrics(auth_service):
+    waits_before = REGISTRY.get_sample_value("auth_db_pool_checkout_wait_seconds_count") or 0
+    with TestClient(auth_service.app) as client:
+        client.post("/login", json={"username": "nobody", "password": "pw"})
+        metrics = client.get("/metrics").text
+    assert "auth_db_pool_connections_in_use 0.0" in metrics  # every request gave its connection back
+    assert "auth_db_pool_waiting 0.0" in metrics
+    assert REGISTRY.get_sample_value("auth_db_pool_checkout_wait_seconds_count") == waits_before + 1
+
+
+def test_pool_timeout_is_503(auth_service, monkeypatch):
+    from sqlalchemy.exc import TimeoutError
+
+    def exhausted():
+        raise TimeoutError("QueuePool limit reached")
+
+    monkeypatch.setattr(auth_service.engine.pool, "connect", exhausted)
+    with TestClient(auth_service.app) as client:
+        r = client.post("/login", json={"username": "nobody", "password": "pw"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
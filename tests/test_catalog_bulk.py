@@ -0,0 +1,68 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_bulk_ndjson_reports_bad_rows(catalog_service):
+    client = catalog_service.app.test_client()
+    lines = [
+        {"name": "Bulk fan", "price": 9.5},
+        {"name": "", "price": 1},
+        "not json",
+        {"name": "Bulk cable", "price": -1},
+        {"name": "Bulk case", "price": 70},
+    ]
+    body = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+
+    r = client.post("/catalog/bulk", data=body, content_type="application/x-ndjson")
+
+    assert r.status_code == 200
+    report = r.get_json()
+    assert report["inserted"] == 2
+    assert report["failed"] == 3
+    assert [e["row"] for e in report["errors"]] == [1, 2, 3]
+    names = {p["name"] for p in client.get("/catalog?limit=1000").get_json()}
+    assert {"Bulk fan", "Bulk case"} <= names
+
+
+def test_bulk_json_array_in_chunks(catalog_service, monkeypatch):
+    monkeypatch.setattr(catalog_service, "BULK_CHUNK_SIZE", 3)
+    client = catalog_service.app.test_client()
+    rows = [{"name": f"Array part {i}", "price": i + 1} for i in range(10)]
+
+    r = client.post("/catalog/bulk", json=rows)
+
+    assert r.get_json() == {"inserted": 10, "failed": 0, "errors": []}
+
+
+def test_bulk_malformed_array_inserts_nothing(catalog_service):
+    client = catalog_service.app.test_client()
+    before = len(client.get("/catalog?limit=1000").get_json())
+
+    r = client.post("/catalog/bulk", data='[{"name": "Half", "price": 1}, {"name": ', content_type="application/json")
+
+    assert r.status_code == 400
+    assert len(client.get("/catalog?limit=1000").get_json()) == before
+
+
+def test_gateway_bulk_route_is_admin_only(mock_upstream, auth_header):
+    received = []
+
+    def catalog(req):
+        received.append((req.headers["content-type"], req.content))
+        return httpx.Response(200, json={"inserted": 1, "failed": 0, "errors": []})
+
+    mock_upstream("catalog", catalog)
+    body = b'{"name": "GPU", "price": 1}\n'
+
+    with TestClient(app) as client:
+        headers = {"Content-Type": "application/x-ndjson"}
+        assert client.post("/products/bulk", content=body, headers={**headers, **auth_header()}).status_code == 403
+
+        r = client.post("/products/bulk", content=body, headers={**headers, **auth_header(role="admin")})
+        assert r.json()["inserted"] == 1
+
+    assert received == [("application/x-ndjson", body)]
@@ -0,0 +1,45 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_lookup_returns_found_and_missing(catalog_service):
+    client = catalog_service.app.test_client()
+    a = client.post("/catalog", json={"name": "Lookup A", "price": 1}).get_json()["id"]
+    b = client.post("/catalog", json={"name": "Lookup B", "price": 2}).get_json()["id"]
+    missing = b + 10_000
+
+    r = client.get(f"/catalog/lookup?ids={b},{missing},{a},{b}")
+    assert r.status_code == 200
+    assert [p["id"] for p in r.get_json()["products"]] == [b, a]
+    assert r.get_json()["missing"] == [missing]
+
+    r = client.post("/catalog/lookup", json={"ids": [a, missing]})
+    assert [p["name"] for p in r.get_json()["products"]] == ["Lookup A"]
+
+
+def test_lookup_rejects_bad_ids(catalog_service, monkeypatch):
+    client = catalog_service.app.test_client()
+    assert client.get("/catalog/lookup").status_code == 400
+    assert client.get("/catalog/lookup?ids=1,x").status_code == 400
+    assert client.post("/catalog/lookup", json={"ids": [1.5]}).status_code == 400
+
+    monkeypatch.setattr(catalog_service, "LOOKUP_MAX_IDS", 2)
+    assert client.get("/catalog/lookup?ids=1,2,3").status_code == 400
+
+
+def test_gateway_lookup_is_public(mock_upstream):
+    seen = []
+
+    def catalog(req):
+        seen.append((req.url.path, req.url.params["ids"]))
+        return httpx.Response(200, json={"products": [], "missing": [1, 2]})
+
+    mock_upstream("catalog", catalog)
+
+    with TestClient(app) as client:
+        assert client.get("/products/lookup?ids=1,2").json() == {"products": [], "missing": [1, 2]}
+        assert client.get("/products/lookup?ids=1,,2").status_code == 422
+
+    assert seen == [("/catalog/lookup", "1,2")]
@@ -0,0 +1,132 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_catalog_keyset_pages(catalog_service):
+    client = catalog_service.app.test_client()
+    created = [client.post("/catalog", json={"name": f"Page part {i}", "price": 1 + i}).get_json()["id"]
+               for i in range(5)]
+    start = created[0] - 1
+
+    first = client.get(f"/catalog?limit=2&cursor={start}")
+    assert [p["id"] for p in first.get_json()] == created[:2]
+    assert first.headers["X-Next-Cursor"] == str(created[1])
+
+    second = client.get(f"/catalog?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert [p["id"] for p in second.get_json()] == created[2:4]
+
+    last = client.get(f"/catalog?limit=10&cursor={created[3]}")
+    assert created[4] in [p["id"] for p in last.get_json()]
+    assert "X-Next-Cursor" not in last.headers
+
+
+def test_catalog_rejects_bad_page_args(catalog_service):
+    client = catalog_service.app.test_client()
+    assert client.get("/catalog?limit=0").status_code == 400
+    assert client.get("/catalog?limit=100000").status_code == 400
+    assert client.get("/catalog?cursor=abc").status_code == 400
+
+
+def test_gateway_forwards_page_params_and_cursor(mock_upstream):
+    seen = []
+
+    def catalog(req):
+        seen.append(dict(req.url.params))
+        return httpx.Response(200, json=[{"id": 3, "name": "GPU", "price": 1.0}], headers={"X-Next-Cursor": "3"})
+
+    mock_upstream("catalog", catalog)
+
+    with TestClient(app) as client:
+        r = client.get("/products?limit=1&cursor=2")
+        assert r.headers["x-next-cursor"] == "3"
+        assert client.get("/products?limit=0").status_code == 422
+
+    assert seen == [{"limit": "1", "cursor": "2"}]
+
+
+def test_catalog_pages_carry_etag_until_a_write(catalog_service):
+    client = catalog_service.app.test_client()
+    start = client.post("/catalog", json={"name": "Snapshot part", "price": 1}).get_json()["id"] - 1
+
+    first = client.get(f"/catalog?limit=5&cursor={start}")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    again = client.get(f"/catalog?limit=5&cursor={start}")
+    assert again.headers["ETag"] == etag and again.data == first.data
+
+    r = client.get(f"/catalog?limit=5&cursor={start}", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.data == b""
+    assert r.headers["ETag"] == etag
+
+    client.post("/catalog", json={"name": "Snapshot part 2", "price": 2})
+    r = client.get(f"/catalog?limit=5&cursor={start}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert [p["name"] for p in r.get_json()] == ["Snapshot part", "Snapshot part 2"]
+
+
+def test_late_commit_of_lower_ids_invalidates_pages(catalog_service):
+    """A long bulk load takes its ids first but commits after a later single insert."""
+    client = catalog_service.app.test_client()
+    first_id = client.post("/catalog", json={"name": "Early part", "price": 1}).get_json()["id"]
+
+    def commit_product(product_id, name):
+        with catalog_service.app.app_context():
+            catalog_service.db.session.add(catalog_service.Product(id=product_id, name=name, price=1))
+            catalog_service.bump_catalog_version()
+            catalog_service.db.session.commit()
+
+    commit_product(first_id + 2, "Single insert")  # committed first, highest id
+    page = client.get(f"/catalog?limit=5&cursor={first_id - 1}")
+    assert [p["id"] for p in page.get_json()] == [first_id, first_id + 2]
+
+    commit_product(first_id + 1, "Bulk feed row")  # max(id) does not move
+    r = client.get(f"/catalog?limit=5&cursor={first_id - 1}", headers={"If-None-Match": page.headers["ETag"]})
+    assert r.status_code == 200
+    assert [p["id"] for p in r.get_json()] == [first_id, first_id + 1, first_id + 2]
+
+
+def test_bulk_ingestion_invalidates_pages(catalog_service):
+    client = catalog_service.app.test_client()
+    start = client.post("/catalog", json={"name": "Before bulk", "price": 1}).get_json()["id"] - 1
+    etag = client.get(f"/catalog?limit=5&cursor={start}").headers["ETag"]
+    client.post("/catalog/bulk", data='{"name": "Bulk row", "price": 2}\n', content_type="application/x-ndjson")
+    r = client.get(f"/catalog?limit=5&cursor={start}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert [p["name"] for p in r.get_json()] == ["Before bulk", "Bulk row"]
+
+
+def test_gateway_revalidates_catalog_pages(mock_upstream, monkeypatch):
+    import main
+
+    seen = []
+
+    def catalog(req):
+        seen.append(req.headers.get("if-none-match"))
+        if req.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=[{"id": 1, "name": "GPU", "price": 1.0}], headers={"ETag": '"v1"'})
+
+    mock_upstream("catalog", catalog)
+
+    with TestClient(app) as client:
+        first = client.get("/products")
+        assert first.headers["etag"] == '"v1"'
+        # answered from the gateway cache without a catalog call
+        assert client.get("/products", headers={"If-None-Match": '"v1"'}).status_code == 304
+        assert seen == [None]
+
+        # expired entry: revalidated with the cached ETag, body kept
+        monkeypatch.setattr(main.products_cache, "ttl", 0)
+        main.products_cache.set(main.CATALOG_URL, main.products_cache.get(main.CATALOG_URL))
+        r = client.get("/products")
+        assert r.status_code == 200 and r.json()[0]["name"] == "GPU"
+        assert seen == [None, '"v1"']
+
+        # nothing cached: the client's validator is forwarded and the 304 passed back
+        main.products_cache.invalidate()
+        r = client.get("/products", headers={"If-None-Match": '"v1"'})
+        assert r.status_code == 304 and r.headers["etag"] == '"v1"'
+        assert seen == [None, '"v1"', '"v1"']
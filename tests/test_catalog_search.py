@@ -0,0 +1,131 @@
+import importlib.util
+import pathlib
+
+import httpx
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from fastapi.testclient import TestClient
+
+from main import app
+
+repo_root = pathlib.Path(__file__).resolve().parents[1]
+
+NAMES = ["Red Zephyr Scarf", "Zephyr Socks", "Scarf Ring", "Steel Kettle", "Blue_Zephyr Hat"]
+
+
+def run_search_migration(service, direction):
+    path = next((repo_root / "catalog-service/migrations/versions").glob("232df4843847_*.py"))
+    spec = importlib.util.spec_from_file_location("search_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with service.app.app_context(), service.db.engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            getattr(migration, direction)()
+        service.search_backend.cache_clear()
+
+
+@pytest.fixture
+def fts_service(catalog_service):
+    """The session catalog db with the search migration applied for one test."""
+    client = catalog_service.app.test_client()
+    client.post("/catalog", json={"name": NAMES[0], "price": 1})  # before the migration: picked up by the rebuild
+    run_search_migration(catalog_service, "upgrade")
+    for name in NAMES[1:]:
+        client.post("/catalog", json={"name": name, "price": 1})  # after: kept in sync by the triggers
+    yield catalog_service
+    run_search_migration(catalog_service, "downgrade")
+    with catalog_service.app.app_context():
+        db, Product = catalog_service.db, catalog_service.Product
+        db.session.execute(db.delete(Product).where(Product.name.in_(NAMES)))
+        db.session.commit()
+
+
+def names(response):
+    return [p["name"] for p in response.get_json()]
+
+
+def test_search_fts_matches_word_prefixes(fts_service):
+    client = fts_service.app.test_client()
+    with fts_service.app.app_context():
+        assert fts_service.search_backend() == "fts5"
+
+    assert sorted(names(client.get("/catalog/search?q=zephyr"))) == ["Blue_Zephyr Hat", "Red Zephyr Scarf", "Zephyr Socks"]
+    assert names(client.get("/catalog/search?q=scar zep")) == ["Red Zephyr Scarf"]
+    assert names(client.get("/catalog/search?q=kettle\"*")) == ["Steel Kettle"]  # FTS syntax is not passed through
+
+    first = client.get("/catalog/search?q=zephyr&limit=2")
+    assert len(first.get_json()) == 2 and first.headers["X-Next-Cursor"] == "2"
+    rest = client.get("/catalog/search?q=zephyr&limit=2&cursor=2")
+    assert len(rest.get_json()) == 1 and "X-Next-Cursor" not in rest.headers
+
+
+def test_search_fts_follows_updates_and_deletes(fts_service):
+    client = fts_service.app.test_client()
+    pid = client.post("/catalog", json={"name": "Copperleaf Kettle", "price": 3}).get_json()["id"]
+    assert "Copperleaf Kettle" in names(client.get("/catalog/search?q=copperleaf"))
+    with fts_service.app.app_context():
+        db = fts_service.db
+        db.session.execute(db.update(fts_service.Product).where(fts_service.Product.id == pid).values(name="Brasswork Kettle"))
+        db.session.commit()
+    assert names(client.get("/catalog/search?q=copperleaf")) == []
+    assert names(client.get("/catalog/search?q=brasswork")) == ["Brasswork Kettle"]
+    with fts_service.app.app_context():
+        db.session.execute(db.delete(fts_service.Product).where(fts_service.Product.id == pid))
+        db.session.commit()
+    assert names(client.get("/catalog/search?q=brasswork")) == []
+
+
+def test_search_falls_back_to_like_without_index(catalog_service):
+    client = catalog_service.app.test_client()
+    for name in ["Search Lumen Shade", "Desk Lumen", "Lumen_Post"]:
+        client.post("/catalog", json={"name": name, "price": 1})
+    with catalog_service.app.app_context():
+        assert catalog_service.search_backend() == "like"
+
+    assert names(client.get("/catalog/search?q=lumen"))[:1] == ["Lumen_Post"]  # prefix match ranks first
+    assert names(client.get("/catalog/search?q=shade lumen")) == ["Search Lumen Shade"]
+    assert names(client.get("/catalog/search?q=k_l")) == []  # "_" is literal, not a wildcard
+
+
+class FakeResult:
+    def all(self):
+        return []
+
+
+@pytest.mark.parametrize("backend, ranks_by_similarity", [("pg_trgm", True), ("tsvector", False)])
+def test_postgres_search_uses_similarity_only_with_pg_trgm(catalog_service, monkeypatch, backend, ranks_by_similarity):
+    # no Postgres here: check the statement, not its results
+    statements = []
+    monkeypatch.setattr(catalog_service, "search_backend", lambda: backend)
+    monkeypatch.setattr(catalog_service.db.session, "execute",
+                        lambda statement, params: statements.append(str(statement)) or FakeResult())
+    assert catalog_service.app.test_client().get("/catalog/search?q=lamp").status_code == 200
+    assert ("similarity(" in statements[0]) is ranks_by_similarity
+    assert "to_tsquery" in statements[0]
+
+
+def test_search_rejects_bad_queries(catalog_service):
+    client = catalog_service.app.test_client()
+    assert client.get("/catalog/search").status_code == 400
+    assert client.get("/catalog/search?q=%20*%20").status_code == 400
+    assert client.get("/catalog/search?q=lamp&cursor=-1").status_code == 400
+
+
+def test_gateway_search_is_public(mock_upstream):
+    seen = []
+
+    def catalog(req):
+        seen.append((req.url.path, dict(req.url.params)))
+        return httpx.Response(200, json=[{"id": 1, "name": "Zephyr Socks", "price": 4.0}], headers={"X-Next-Cursor": "1"})
+
+    mock_upstream("catalog", catalog)
+
+    with TestClient(app) as client:
+        r = client.get("/products/search?q=zephyr&limit=1")
+        assert r.status_code == 200
+        assert r.json()[0]["name"] == "Zephyr Socks"
+        assert r.headers["X-Next-Cursor"] == "1"
+        assert client.get("/products/search").status_code == 422
+
+    assert seen == [("/catalog/search", {"q": "zephyr", "limit": "1"})]
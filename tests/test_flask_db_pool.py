@@ -0,0 +1,82 @@
+import os, pathlib, subprocess, sys
+
+import pytest
+import sqlalchemy as sa
+from prometheus_client import REGISTRY
+
+
+@pytest.fixture(params=["catalog", "order"])
+def service(request, catalog_service, order_service):
+    return {"catalog": catalog_service, "order": order_service}[request.param], request.param
+
+
+def sample(name):
+    return REGISTRY.get_sample_value(name) or 0
+
+
+def test_engine_uses_pool_settings(service):
+    module, _ = service
+    with module.app.app_context():
+        pool = module.db.engine.pool
+    assert isinstance(pool, module.TimedQueuePool)
+    assert pool.size() == 5 and pool._max_overflow == 10 and pool._pre_ping
+
+
+def test_requests_return_their_connections(service):
+    module, prefix = service
+    waits_before = sample(f"{prefix}_db_pool_checkout_wait_seconds_count")
+    path = "/catalog/1" if prefix == "catalog" else "/orders"
+    module.app.test_client().get(path, headers={"X-User": "alice"})
+    metrics = module.app.test_client().get("/metrics").get_data(as_text=True)
+    assert f"{prefix}_db_pool_connections_in_use 0.0" in metrics
+    assert f"{prefix}_db_pool_overflow 0.0" in metrics
+    assert sample(f"{prefix}_db_pool_checkout_wait_seconds_count") > waits_before
+
+
+def test_overflow_and_timeout(catalog_service, tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=catalog_service.TimedQueuePool,
+                              pool_size=1, max_overflow=1, pool_timeout=0.05)
+    first, second = engine.connect(), engine.connect()
+    assert sample("catalog_db_pool_overflow") == 1
+    assert sample("catalog_db_pool_connections_in_use") == 2
+    with pytest.raises(sa.exc.TimeoutError):
+        engine.connect()
+    assert REGISTRY.get_sample_value("catalog_db_pool_checkout_wait_seconds_bucket", {"le": "0.05"}) < \
+        sample("catalog_db_pool_checkout_wait_seconds_count")  # the timed-out checkout waited
+    second.close()  # idles in the pool: still open, still overflow
+    assert sample("catalog_db_pool_overflow") == 1
+    first.close()  # no room left in the pool: closed for good
+    assert sample("catalog_db_pool_overflow") == 0
+    assert sample("catalog_db_pool_connections_in_use") == 0
+    engine.dispose()
+
+
+def test_pool_timeout_is_503(service, monkeypatch):
+    module, prefix = service
+
+    def exhausted():
+        raise sa.exc.TimeoutError("QueuePool limit reached")
+
+    with module.app.app_context():
+        monkeypatch.setattr(module.db.engine.pool, "connect", exhausted)
+    path = "/catalog/1" if prefix == "catalog" else "/orders"
+    r = module.app.test_client().get(path, headers={"X-User": "alice"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+@pytest.mark.parametrize("service_dir", ["catalog-service", "order-service"])
+def test_migrations_import_the_app_without_a_metrics_dir(service_dir, tmp_path):
+    # env.py does `from app import db`; the gauges must not need the directory to exist yet
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'service.db'}",
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "missing" / "prometheus"),
+    }
+    done = subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=pathlib.Path(__file__).resolve().parents[1] / service_dir, env=env, capture_output=True, text=True,
+    )
+    assert done.returncode == 0, done.stderr
+    with sa.create_engine(env["DATABASE_URL"]).connect() as conn:
+        assert conn.execute(sa.text("select version_num from alembic_version")).scalar()
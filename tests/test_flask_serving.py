@@ -0,0 +1,68 @@
+import os, pathlib, signal, socket, subprocess, sys, time
+
+import httpx
+import pytest
+
+# not `from conftest import repo_root`: under `pytest -q` that can resolve to tests/integration/conftest.py
+repo_root = pathlib.Path(__file__).resolve().parents[1]
+
+pytest.importorskip("gunicorn")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def gunicorn_catalog(tmp_path):
+    port = free_port()
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "WEB_WORKERS": "2",
+        "WEB_THREADS": "2",
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'catalog.db'}",
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "prometheus"),
+    }
+    (tmp_path / "prometheus").mkdir()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=repo_root / "catalog-service", env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base}/metrics", timeout=1)
+            break
+        except httpx.TransportError:
+            time.sleep(0.1)
+    else:
+        proc.kill()
+        pytest.fail("gunicorn did not start")
+    yield proc, base
+    if proc.poll() is None:
+        proc.kill()
+
+
+def test_metrics_are_summed_across_workers(gunicorn_catalog):
+    _, base = gunicorn_catalog
+    with httpx.Client() as client:
+        for _ in range(20):
+            assert client.get(f"{base}/health").status_code == 200
+    # fresh connections spread over both workers; each keeps its own counter file
+    for _ in range(20):
+        httpx.get(f"{base}/health")
+
+    metrics = httpx.get(f"{base}/metrics").text
+    line = next(l for l in metrics.splitlines()
+                if l.startswith("catalog_requests_total{") and 'endpoint="/health"' in l)
+    assert float(line.rsplit(" ", 1)[1]) == 40
+
+
+def test_sigterm_shuts_down_gracefully(gunicorn_catalog):
+    proc, base = gunicorn_catalog
+    assert httpx.get(f"{base}/health").status_code == 200
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=25) == 0
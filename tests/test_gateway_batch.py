@@ -0,0 +1,45 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_batch_fans_out_and_isolates_failures(mock_upstream, auth_header):
+    mock_upstream("catalog", lambda req: httpx.Response(200, json=[{"id": 1, "name": "GPU", "price": 399.99}]))
+
+    def orders(req):
+        if req.url.path == "/order/1":
+            return httpx.Response(200, json={"id": 1, "username": req.headers["x-user"]})
+        return httpx.Response(404, json={"description": "Order not found"})
+
+    mock_upstream("order", orders)
+
+    body = {"requests": [
+        {"id": "catalog", "path": "/products"},
+        {"id": "mine", "path": "/orders/1"},
+        {"id": "missing", "path": "/orders/2"},
+        {"id": "not-admin", "method": "POST", "path": "/products", "body": {"name": "SSD", "price": 1}},
+        {"id": "bad-body", "method": "POST", "path": "/orders", "body": {"quantity": 0}},
+    ]}
+
+    with TestClient(app) as client:
+        r = client.post("/batch", json=body, headers=auth_header(username="alice"))
+
+    assert r.status_code == 200
+    results = {item["id"]: item for item in r.json()["responses"]}
+    assert results["catalog"] == {"id": "catalog", "status": 200, "body": [{"id": 1, "name": "GPU", "price": 399.99}]}
+    assert results["mine"]["body"]["username"] == "alice"
+    assert results["missing"]["status"] == 404
+    assert results["not-admin"]["status"] == 403
+    assert results["bad-body"]["status"] == 422
+
+
+def test_batch_requires_auth_and_rejects_nesting(auth_header):
+    with TestClient(app) as client:
+        assert client.post("/batch", json={"requests": [{"path": "/health"}]}).status_code == 401
+
+        r = client.post("/batch", json={"requests": [{"path": "/batch"}]}, headers=auth_header())
+        assert r.status_code == 400
+
+        too_many = {"requests": [{"path": "/health"}] * 100}
+        assert client.post("/batch", json=too_many, headers=auth_header()).status_code == 422
@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from main import app, catalog_client
+
+
+def test_breaker_opens_then_half_opens_then_closes(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=5, clock=clock)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 6
+    breaker.before_call()               # the single trial call
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()           # no second trial while the first is running
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_idempotent_get_is_retried(mock_upstream):
+    responses = iter([httpx.Response(503), httpx.Response(502), httpx.Response(200, json=[])])
+    calls = []
+
+    def flaky(req):
+        calls.append(req.method)
+        return next(responses)
+
+    mock_upstream("catalog", flaky)
+
+    with TestClient(app) as client:
+        assert client.get("/products").status_code == 200
+    assert len(calls) == 3
+
+
+def test_open_circuit_fails_fast_with_503(mock_upstream):
+    calls = []
+
+    async def slow_and_broken(req):
+        calls.append(req.url.path)
+        await asyncio.sleep(0.01)
+        raise httpx.ConnectError("refused", request=req)
+
+    mock_upstream("catalog", slow_and_broken)
+    threshold = catalog_client.breaker.failure_threshold
+
+    with TestClient(app) as client:
+        # retries burn through the threshold; the request that trips it already gets the 503
+        statuses = [client.get("/products").status_code for _ in range(threshold)]
+        assert catalog_client.breaker.state == OPEN
+        assert statuses[-1] == 503
+        assert len(calls) == threshold
+
+        r = client.get("/products")
+        assert r.status_code == 503
+        assert int(r.headers["retry-after"]) >= 1
+        assert len(calls) == threshold  # failed fast, upstream not touched
+
+        metrics = client.get("/metrics").text
+        assert 'gateway_upstream_circuit_state{upstream="catalog"} 2.0' in metrics
+        assert 'gateway_upstream_circuit_transitions_total{state="open",upstream="catalog"}' in metrics
@@ -0,0 +1,67 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from cache import TTLCache
+from main import app
+
+
+def test_ttl_cache_expires_and_evicts_lru(clock):
+    cache = TTLCache("test", max_entries=2, ttl=10, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1      # "a" is now most recently used
+    cache.set("c", 3)               # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    cache.set("short", 4, ttl=1)
+    clock.now = 5
+    assert cache.get("short") is None
+    assert cache.get("c") == 3
+    clock.now = 11
+    assert cache.get("c") is None
+
+
+def test_products_cached_until_create(mock_upstream, auth_header):
+    calls = []
+    catalog = [{"id": 1, "name": "GPU", "price": 399.99}]
+
+    def handler(req):
+        calls.append(req.method)
+        if req.method == "POST":
+            catalog.append({"id": 2, **json.loads(req.content)})
+            return httpx.Response(201, json=catalog[-1])
+        return httpx.Response(200, json=catalog)
+
+    mock_upstream("catalog", handler)
+
+    with TestClient(app) as client:
+        assert client.get("/products").json() == catalog[:1]
+        assert client.get("/products").json() == catalog[:1]
+        assert calls == ["GET"]
+
+        r = client.post("/products", json={"name": "SSD", "price": 129.99}, headers=auth_header(role="admin"))
+        assert r.status_code == 201
+
+        assert len(client.get("/products").json()) == 2
+        assert calls == ["GET", "POST", "GET"]
+
+        metrics = client.get("/metrics").text
+        assert 'gateway_cache_hits_total{cache="products"}' in metrics
+        assert 'gateway_cache_evictions_total{cache="products",reason="invalidated"}' in metrics
+
+
+def test_ttl_cache_get_stale_keeps_expired_entries(clock):
+    cache = TTLCache("test", max_entries=2, ttl=10, clock=clock)
+
+    assert cache.get_stale("a") == (None, False)
+    cache.set("a", 1)
+    assert cache.get_stale("a") == (1, True)
+    clock.now = 11
+    assert cache.get_stale("a") == (1, False)
+    assert cache.get_stale("a") == (1, False)  # still there to revalidate
+    cache.set("a", 1)
+    assert cache.get_stale("a") == (1, True)
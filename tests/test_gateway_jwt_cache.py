@@ -0,0 +1,34 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+
+
+def test_repeat_requests_skip_jwt_decode(mock_upstream, auth_header, monkeypatch):
+    decodes = []
+    real_decode = main.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decodes.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(main.jwt, "decode", counting_decode)
+    mock_upstream("order", lambda req: httpx.Response(200, json=[]))
+    headers = auth_header(username="bob")
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.get("/orders", headers=headers).status_code == 200
+
+    assert len(decodes) == 1
+    assert len(main.jwt_cache) == 1
+
+
+def test_cached_claims_expire_with_token(auth_header, monkeypatch):
+    token = auth_header(minutes=1)["Authorization"].split(" ", 1)[1]
+    payload = main.verify_token(token)
+
+    monkeypatch.setattr(main.jwt_cache, "clock", lambda: 10**12)
+    assert main.jwt_cache.get(main.hashlib.sha256(token.encode()).digest()) is None
+    assert payload["sub"] == "bob"
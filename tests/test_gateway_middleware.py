@@ -0,0 +1,42 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_missing_and_invalid_tokens_are_rejected():
+    with TestClient(app) as client:
+        r = client.get("/orders")
+        assert r.status_code == 401
+        assert r.json() == {"detail": "Missing Bearer token"}
+
+        r = client.get("/orders", headers={"Authorization": "Bearer not-a-jwt"})
+        assert r.status_code == 401
+        assert r.json() == {"detail": "Invalid or expired token"}
+
+
+def test_rejections_carry_cors_headers():
+    with TestClient(app) as client:
+        r = client.get("/orders", headers={"Origin": "http://localhost:5173"})
+        assert r.status_code == 401
+        assert r.headers["access-control-allow-origin"] == "http://localhost:5173"
+
+
+def test_authenticated_user_reaches_handler(mock_upstream, auth_header):
+    seen = []
+
+    def handler(req):
+        seen.append(req.headers["x-user"])
+        return httpx.Response(200, json=[{"product_id": 1, "quantity": 2}])
+
+    mock_upstream("order", handler)
+
+    with TestClient(app) as client:
+        r = client.get("/orders", headers=auth_header(username="alice"))
+        assert r.status_code == 200
+        assert seen == ["alice"]
+        assert client.get("/orders").status_code == 401
+
+        metrics = client.get("/metrics").text
+        assert 'gateway_requests_total{endpoint="/orders",http_status="200",method="GET"}' in metrics
+        assert 'gateway_requests_total{endpoint="/orders",http_status="401",method="GET"}' in metrics
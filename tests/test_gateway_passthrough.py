@@ -0,0 +1,46 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+
+UPSTREAM_BODY = b'[{"id": 1, "name": "GPU", "price": 399.99, "stock": 3}]'
+
+
+def catalog_handler(req):
+    return httpx.Response(200, headers={"content-type": "application/json", "x-upstream": "catalog"}, content=UPSTREAM_BODY)
+
+
+def test_passthrough_streams_upstream_bytes(mock_upstream):
+    mock_upstream("catalog", catalog_handler)
+
+    with TestClient(app) as client:
+        for _ in range(2):  # second one is served from the products cache
+            r = client.get("/products")
+            assert r.status_code == 200
+            assert r.content == UPSTREAM_BODY  # not re-serialized, extra fields kept
+            assert r.headers["x-upstream"] == "catalog"
+
+
+def test_validated_route_reserializes(mock_upstream, monkeypatch):
+    monkeypatch.setattr(main, "VALIDATE_ROUTES", {"list_products"})
+    mock_upstream("catalog", catalog_handler)
+
+    with TestClient(app) as client:
+        r = client.get("/products")
+        assert r.json() == [{"id": 1, "name": "GPU", "price": 399.99}]
+
+
+def test_passthrough_keeps_upstream_errors(mock_upstream, auth_header):
+    seen = []
+
+    def handler(req):
+        seen.append(req.url.path)
+        return httpx.Response(404, json={"description": "Order not found"})
+
+    mock_upstream("order", handler)
+
+    with TestClient(app) as client:
+        r = client.get("/orders/5", headers=auth_header())
+        assert r.status_code == 404
+        assert seen == ["/order/5"]
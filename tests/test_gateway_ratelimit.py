@@ -0,0 +1,132 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from ratelimit import InMemoryRateLimitStore, RateLimit, RateLimiter, RateLimitMiddleware, parse_route_limits
+
+
+def test_parse_route_limits():
+    limits = parse_route_limits("POST /orders=5:10, get /products=0, GET /orders/{order_id}=2")
+    assert limits == {
+        ("POST", "/orders"): RateLimit(5, 10),
+        ("GET", "/products"): None,
+        ("GET", "/orders/{order_id}"): RateLimit(2, 2),
+    }
+
+
+@pytest.mark.parametrize("spec", ["0:5", "-1:5", "5:0"])
+def test_parse_rejects_buckets_that_never_admit(spec):
+    with pytest.raises(ValueError):
+        RateLimit.parse(spec)
+    assert RateLimit.parse("0.0") is None  # like "0": no limit
+
+
+def test_bucket_refills_over_time():
+    store = InMemoryRateLimitStore()
+    limit = RateLimit(rate=2, burst=2)
+    take = lambda now: asyncio.run(store.take("k", limit, now))
+
+    assert take(0) == 0 and take(0) == 0
+    assert take(0) == 0.5          # empty: one token comes back in 0.5s
+    assert take(0.5) == 0
+
+
+def test_post_orders_limited_per_user(mock_upstream, auth_header):
+    mock_upstream("order", lambda req: httpx.Response(201, json={"product_id": 1, "quantity": 1}))
+    order = {"product_id": 1, "quantity": 1}
+
+    with TestClient(app) as client:
+        statuses = [client.post("/orders", json=order, headers=auth_header(username="flood")).status_code
+                    for _ in range(15)]
+        assert statuses[:10] == [201] * 10   # default burst for POST /orders
+        assert 429 in statuses[10:]
+
+        r = client.post("/orders", json=order, headers=auth_header(username="flood"))
+        assert r.status_code == 429
+        assert int(r.headers["retry-after"]) >= 1
+
+        # another user has their own bucket
+        assert client.post("/orders", json=order, headers=auth_header(username="calm")).status_code == 201
+
+
+def test_batch_sub_requests_share_the_route_bucket(mock_upstream, auth_header):
+    placed = []
+
+    def order(req):
+        placed.append(req)
+        return httpx.Response(201, json={"product_id": 1, "quantity": 1})
+
+    mock_upstream("order", order)
+    sub = {"method": "POST", "path": "/orders", "body": {"product_id": 1, "quantity": 1}}
+
+    with TestClient(app) as client:
+        r = client.post("/batch", json={"requests": [sub] * 15}, headers=auth_header(username="batcher"))
+        assert r.status_code == 200
+        statuses = sorted(item["status"] for item in r.json()["responses"])
+        assert statuses == [201] * 10 + [429] * 5   # the POST /orders burst, not one per sub-request
+        assert len(placed) == 10
+
+        # the same bucket as direct calls: nothing left for a plain POST /orders either
+        r = client.post("/orders", json=sub["body"], headers=auth_header(username="batcher"))
+        assert r.status_code == 429
+
+
+class SharedStore:
+    """Stand-in for a store shared by several gateway replicas (e.g. one Redis)."""
+
+    def __init__(self):
+        self.backend = InMemoryRateLimitStore()
+        self.calls = 0
+
+    async def take(self, key, limit, now):
+        self.calls += 1
+        return await self.backend.take(key, limit, now)
+
+
+def test_pluggable_store_shared_by_replicas():
+    async def ok(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    store = SharedStore()
+    replicas = [
+        RateLimitMiddleware(ok, routes=[], limiter=RateLimiter(store, {}, RateLimit(1, 3)))
+        for _ in range(2)
+    ]
+
+    async def hit(replica):
+        transport = httpx.ASGITransport(app=replica)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            return (await client.get("/anything")).status_code
+
+    statuses = [asyncio.run(hit(replicas[i % 2])) for i in range(4)]
+    assert statuses == [200, 200, 200, 429]  # one client IP, one bucket across both replicas
+    assert store.calls == 4
+
+
+def test_load_shedding_past_max_in_flight():
+    release = asyncio.Event()
+
+    async def slow(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    limiter = RateLimitMiddleware(slow, routes=[], limiter=RateLimiter(InMemoryRateLimitStore(), {}, None),
+                                  max_in_flight=2)
+
+    async def run():
+        transport = httpx.ASGITransport(app=limiter)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            held = [asyncio.create_task(client.get("/x")) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            shed = await client.get("/x")
+            release.set()
+            return shed, [r.status_code for r in await asyncio.gather(*held)]
+
+    shed, held = asyncio.run(run())
+    assert shed.status_code == 503
+    assert held == [200, 200]
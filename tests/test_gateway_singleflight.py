@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+
+import main
+from main import app
+
+
+async def fire(path: str, count: int, headers=None) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        return await asyncio.gather(*(client.get(path, headers=headers) for _ in range(count)))
+
+
+def test_concurrent_product_misses_share_one_upstream_call(mock_upstream):
+    calls = []
+
+    async def slow_catalog(req):
+        calls.append(req.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=[{"id": 1, "name": "GPU", "price": 399.99}])
+
+    mock_upstream("catalog", slow_catalog)
+
+    responses = asyncio.run(fire("/products", 20))
+
+    assert [r.status_code for r in responses] == [200] * 20
+    assert {r.content for r in responses} == {responses[0].content}
+    assert len(calls) == 1
+    assert len(main.catalog_client.flights) == 0
+
+
+def test_order_lookups_are_only_shared_per_user(mock_upstream, auth_header):
+    users = []
+
+    async def slow_orders(req):
+        users.append(req.headers["x-user"])
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"id": 7, "username": req.headers["x-user"]})
+
+    mock_upstream("order", slow_orders)
+
+    async def both():
+        return await asyncio.gather(
+            fire("/orders/7", 5, headers=auth_header(username="alice")),
+            fire("/orders/7", 5, headers=auth_header(username="bob")),
+        )
+
+    alice, bob = asyncio.run(both())
+
+    assert sorted(users) == ["alice", "bob"]
+    assert all(r.json()["username"] == "alice" for r in alice)
+    assert all(r.json()["username"] == "bob" for r in bob)
@@ -0,0 +1,49 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app, upstreams
+from upstream import UpstreamConfig
+
+
+def test_upstream_config_from_env(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_READ_TIMEOUT", "3")
+    monkeypatch.setenv("CATALOG_READ_TIMEOUT", "1.5")
+    monkeypatch.setenv("CATALOG_MAX_CONNECTIONS", "7")
+
+    catalog = UpstreamConfig.from_env("catalog")
+    order = UpstreamConfig.from_env("order")
+
+    assert catalog.read_timeout == 1.5
+    assert catalog.limits.max_connections == 7
+    assert order.read_timeout == 3
+    assert order.max_connections == UpstreamConfig.max_connections
+
+
+def test_each_service_has_its_own_pool():
+    clients = {u.name: u.client for u in upstreams}
+    assert set(clients) == {"catalog", "order", "auth"}
+    assert len({id(c) for c in clients.values()}) == 3
+
+
+def test_products_proxied_through_catalog_pool(mock_upstream):
+    mock_upstream("catalog", lambda req: httpx.Response(200, json=[{"id": 1, "name": "GPU", "price": 399.99}]))
+
+    with TestClient(app) as client:
+        r = client.get("/products")
+        assert r.status_code == 200
+        assert r.json() == [{"id": 1, "name": "GPU", "price": 399.99}]
+
+        metrics = client.get("/metrics").text
+        assert 'gateway_upstream_pool_max_connections{upstream="catalog"}' in metrics
+        assert 'gateway_upstream_requests_in_flight{upstream="catalog"} 0.0' in metrics
+
+
+def test_upstream_timeout_returns_504(mock_upstream):
+    def slow(req):
+        raise httpx.ReadTimeout("timed out", request=req)
+
+    mock_upstream("catalog", slow)
+
+    with TestClient(app) as client:
+        r = client.get("/products")
+        assert r.status_code == 504
@@ -0,0 +1,70 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+@pytest.mark.parametrize("catalog", [{1, 2}], indirect=True)
+def test_bulk_order_one_lookup_one_commit(order_service, catalog, monkeypatch):
+    client = order_service.app.test_client()
+    commits = []
+    real_commit = order_service.db.session.commit
+    monkeypatch.setattr(order_service.db.session, "commit", lambda: (commits.append(1), real_commit()))
+
+    items = [
+        {"product_id": 1, "quantity": 2},
+        {"product_id": 9, "quantity": 1},
+        {"product_id": 2, "quantity": 1},
+        {"product_id": 1, "quantity": 0},
+        {"product_id": 1, "quantity": 1},
+    ]
+    r = client.post("/orders/bulk", json={"items": items}, headers={"X-User": "carol"})
+    assert r.status_code == 200
+    results = r.get_json()["results"]
+    assert [res["status"] for res in results] == [201, 404, 201, 400, 201]
+    assert results[0]["body"]["username"] == "carol" and results[2]["body"]["product_id"] == 2
+    assert catalog.lookups == [[1, 9, 2]]
+    assert len(commits) == 1
+
+    # the ids are cached now: no second lookup
+    r = client.post("/orders/bulk", json={"items": items[:2]}, headers={"X-User": "carol"})
+    assert [res["status"] for res in r.get_json()["results"]] == [201, 404]
+    assert len(catalog.lookups) == 1
+
+
+def test_bulk_order_rejects_bad_requests(order_service, catalog, monkeypatch):
+    client = order_service.app.test_client()
+    assert client.post("/orders/bulk", json={"items": [{"product_id": 1, "quantity": 1}]}).status_code == 400
+    assert client.post("/orders/bulk", json={"items": []}, headers={"X-User": "carol"}).status_code == 400
+    monkeypatch.setattr(order_service, "ORDER_BULK_MAX_ITEMS", 1)
+    items = [{"product_id": 1, "quantity": 1}] * 2
+    assert client.post("/orders/bulk", json={"items": items}, headers={"X-User": "carol"}).status_code == 400
+
+
+def test_bulk_order_catalog_down_is_503(order_service, catalog):
+    catalog.fail = True
+    r = order_service.app.test_client().post(
+        "/orders/bulk", json={"items": [{"product_id": 1, "quantity": 1}]}, headers={"X-User": "carol"})
+    assert r.status_code == 503
+
+
+def test_gateway_forwards_bulk_orders(mock_upstream, auth_header):
+    seen = []
+
+    def order(req):
+        seen.append((req.url.path, req.headers["x-user"], json.loads(req.content)))
+        return httpx.Response(200, json={"results": [{"status": 201, "body": {"id": 1}}]})
+
+    mock_upstream("order", order)
+
+    with TestClient(app) as client:
+        r = client.post("/orders/bulk", json={"items": [{"product_id": 1, "quantity": 2}]}, headers=auth_header())
+        assert r.status_code == 200
+        assert r.json()["results"][0]["status"] == 201
+        r = client.post("/orders/bulk", json={"items": []}, headers=auth_header())
+        assert r.status_code == 422
+
+    assert seen == [("/orders/bulk", "bob", {"items": [{"product_id": 1, "quantity": 2}]})]
@@ -0,0 +1,85 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def add_orders(order_service, username, count):
+    with order_service.app.app_context():
+        orders = [order_service.Order(username=username, product_id=1, quantity=i + 1) for i in range(count)]
+        order_service.db.session.add_all(orders)
+        order_service.db.session.commit()
+        return [o.id for o in orders]
+
+
+def test_orders_keyset_pages_newest_first(order_service):
+    ids = add_orders(order_service, "pager", 5)
+    add_orders(order_service, "someone-else", 2)
+    client = order_service.app.test_client()
+    headers = {"X-User": "pager"}
+
+    first = client.get("/orders?limit=2", headers=headers)
+    assert [o["id"] for o in first.get_json()] == ids[:-3:-1]
+    second = client.get(f"/orders?limit=2&cursor={first.headers['X-Next-Cursor']}", headers=headers)
+    assert [o["id"] for o in second.get_json()] == ids[2:0:-1]
+    last = client.get(f"/orders?limit=2&cursor={second.headers['X-Next-Cursor']}", headers=headers)
+    assert [o["id"] for o in last.get_json()] == ids[:1]
+    assert "X-Next-Cursor" not in last.headers
+
+    assert client.get("/orders?limit=0", headers=headers).status_code == 400
+    assert client.get("/orders?cursor=abc", headers=headers).status_code == 400
+
+
+def test_orders_page_query_uses_username_index(order_service):
+    with order_service.app.app_context():
+        plan = order_service.db.session.execute(order_service.db.text(
+            'EXPLAIN QUERY PLAN SELECT * FROM "order" WHERE username = :u AND id < :c ORDER BY id DESC LIMIT 5'
+        ), {"u": "pager", "c": 100}).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_order_username_id" in detail
+    assert "TEMP B-TREE" not in detail  # no sort step: the index already yields id order
+
+
+def test_gateway_forwards_order_page_params(mock_upstream, auth_header):
+    seen = []
+
+    def order(req):
+        seen.append((req.headers["x-user"], dict(req.url.params)))
+        return httpx.Response(200, json=[], headers={"X-Next-Cursor": "7"})
+
+    mock_upstream("order", order)
+
+    with TestClient(app) as client:
+        r = client.get("/orders?limit=10&cursor=9", headers=auth_header())
+        assert r.headers["x-next-cursor"] == "7"
+        assert client.get("/orders?cursor=0", headers=auth_header()).status_code == 422
+
+    assert seen == [("bob", {"limit": "10", "cursor": "9"})]
+
+
+def test_order_detail_is_only_visible_to_its_owner(order_service):
+    [order_id] = add_orders(order_service, "owner", 1)
+    client = order_service.app.test_client()
+    assert client.get(f"/order/{order_id}", headers={"X-User": "owner"}).get_json()["id"] == order_id
+    assert client.get(f"/order/{order_id}", headers={"X-User": "intruder"}).status_code == 404
+    assert client.get(f"/order/{order_id}").status_code == 400
+
+
+def test_gateway_sends_the_caller_on_order_detail(mock_upstream, auth_header, monkeypatch):
+    import main
+
+    seen = []
+
+    def order(req):
+        seen.append(req.headers.get("X-User"))
+        if req.headers.get("X-User") != "alice":
+            return httpx.Response(404, json={"description": "Order not found"})
+        return httpx.Response(200, json={"id": 3, "username": "alice", "product_id": 1, "quantity": 1})
+
+    mock_upstream("order", order)
+    with TestClient(app) as client:
+        assert client.get("/orders/3", headers=auth_header(username="alice")).status_code == 200
+        assert client.get("/orders/3", headers=auth_header(username="mallory")).status_code == 404
+        monkeypatch.setattr(main, "VALIDATE_ROUTES", {"get_order"})
+        assert client.get("/orders/3", headers=auth_header(username="mallory")).status_code == 404
+    assert seen == ["alice", "mallory", "mallory"]
@@ -0,0 +1,51 @@
+import time
+
+
+def place(client, product_id):
+    return client.post("/order", json={"product_id": product_id, "quantity": 1}, headers={"X-User": "bob"})
+
+
+def test_found_products_are_cached(order_service, catalog):
+    client = order_service.app.test_client()
+    assert place(client, 1).status_code == 201
+    assert place(client, 1).status_code == 201
+    assert len(catalog.calls) == 1
+
+
+def test_unknown_products_are_negatively_cached(order_service, catalog, monkeypatch):
+    client = order_service.app.test_client()
+    assert place(client, 2).status_code == 404
+    catalog.known.add(2)
+    assert place(client, 2).status_code == 404  # still cached as missing
+    assert len(catalog.calls) == 1
+
+    later = time.monotonic() + order_service.PRODUCT_CACHE_NEGATIVE_TTL + 1
+    monkeypatch.setattr(order_service.product_cache, "clock", lambda: later)
+    assert place(client, 2).status_code == 201
+    assert len(catalog.calls) == 2
+
+
+def test_catalog_errors_are_503_and_not_cached(order_service, catalog):
+    client = order_service.app.test_client()
+    catalog.fail = True
+    assert place(client, 1).status_code == 503
+    catalog.fail = False
+    assert place(client, 1).status_code == 201
+    assert len(catalog.calls) == 2
+
+
+def test_product_cache_is_bounded_lru(order_service):
+    now = [0.0]
+    cache = order_service.ProductCache(max_entries=2, clock=lambda: now[0])
+    cache.set(1, True, ttl=10)
+    cache.set(2, False, ttl=10)
+    assert cache.get(1) is True
+    cache.set(3, True, ttl=10)  # evicts 2, the least recently used
+    assert cache.get(2) is None
+    now[0] = 11
+    assert cache.get(1) is None
+
+
+def test_rejects_non_integer_product_id(order_service, catalog):
+    assert place(order_service.app.test_client(), "1/../x").status_code == 400
+    assert catalog.calls == []
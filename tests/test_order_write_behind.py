@@ -0,0 +1,213 @@
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from main import app
+
+
+@pytest.fixture
+def async_orders(order_service, monkeypatch):
+    """order-service in async mode with a fresh queue; writers only start when the test says so."""
+    queue = order_service.InMemoryOrderQueue(max_items=100)
+    writers = order_service.OrderWriters(queue, count=2)
+    start = writers.ensure_started
+    monkeypatch.setattr(writers, "ensure_started", lambda: None)
+    monkeypatch.setattr(order_service, "ORDER_ACCEPT_MODE", "async")
+    monkeypatch.setattr(order_service, "order_queue", queue)
+    monkeypatch.setattr(order_service, "order_writers", writers)
+    order_service.product_cache.clear()
+    yield queue, writers, start
+    writers.stop()
+    order_service.product_cache.clear()
+
+
+def place(order_service, username, product_id, quantity=1):
+    return order_service.app.test_client().post(
+        "/order", json={"product_id": product_id, "quantity": quantity}, headers={"X-User": username})
+
+
+def statuses(order_service, username):
+    with order_service.app.app_context():
+        orders = order_service.db.session.execute(
+            order_service.db.select(order_service.Order).where(order_service.Order.username == username)
+            .order_by(order_service.Order.id)).scalars()
+        return [(o.product_id, o.status) for o in orders]
+
+
+@pytest.mark.parametrize("catalog", [{1, 2}], indirect=True)
+def test_async_orders_are_checked_and_committed_in_one_batch(order_service, catalog, async_orders):
+    queue, writers, start = async_orders
+    batches_before = REGISTRY.get_sample_value("order_write_batch_size_count") or 0
+
+    for product_id in (1, 2, 9, 1):
+        r = place(order_service, "flash", product_id)
+        assert r.status_code == 202
+        assert r.get_json()["status"] == "pending"
+    assert len(queue) == 4 and statuses(order_service, "flash") == []
+
+    assert REGISTRY.get_sample_value("order_queue_depth") == 4
+
+    start()
+    writers.stop()  # drains the queue before returning
+    assert statuses(order_service, "flash") == [(1, "created"), (2, "created"), (9, "rejected"), (1, "created")]
+    assert REGISTRY.get_sample_value("order_queue_depth") == 0
+    assert catalog.lookups == [[1, 2, 9]]
+    assert REGISTRY.get_sample_value("order_write_batch_size_count") - batches_before == 1
+
+
+def test_tracking_id_follows_an_order_from_pending_to_written(order_service, catalog, async_orders):
+    queue, writers, start = async_orders
+    client = order_service.app.test_client()
+
+    accepted = [place(order_service, "tracker", product_id).get_json() for product_id in (1, 9)]
+    tracking_ids = [order["tracking_id"] for order in accepted]
+    assert len(set(tracking_ids)) == 2
+    track = lambda tracking_id, user="tracker": client.get(f"/order/tracking/{tracking_id}", headers={"X-User": user})
+    assert track(tracking_ids[0]).status_code == 404  # still queued
+
+    start()
+    writers.stop()
+    assert [track(t).get_json()["status"] for t in tracking_ids] == ["created", "rejected"]
+    assert track(tracking_ids[0], user="someone-else").status_code == 404
+
+
+def test_redelivered_batch_is_written_once(order_service, catalog):
+    item = {"username": "redelivered", "product_id": 1, "quantity": 1, "enqueued_at": time.time(),
+            "tracking_id": "0" * 31 + "1"}
+    with order_service.app.app_context():
+        order_service.write_batch([item])
+        order_service.write_batch([item])  # lease ran out after the commit, before the ack
+    assert statuses(order_service, "redelivered") == [(1, "created")]
+
+
+def test_queue_depth_is_read_from_the_queue(order_service, catalog, async_orders):
+    queue, writers, start = async_orders
+    # left over by a previous run: never counted up by this process
+    queue.put({"username": "backlog", "product_id": 1, "quantity": 1, "enqueued_at": time.time(), "tracking_id": None})
+    place(order_service, "backlog", 1)
+    assert REGISTRY.get_sample_value("order_queue_depth") == 2
+
+    start()
+    writers.stop()
+    assert REGISTRY.get_sample_value("order_queue_depth") == 0
+
+
+def test_async_mode_rejects_bad_payloads_up_front(order_service, async_orders):
+    assert place(order_service, "flash", 1, quantity=0).status_code == 400
+    assert order_service.app.test_client().post("/order", json={"product_id": 1, "quantity": 1}).status_code == 400
+    assert len(async_orders[0]) == 0
+
+
+def test_full_queue_applies_backpressure(order_service, async_orders, monkeypatch):
+    monkeypatch.setattr(async_orders[0], "max_items", 1)
+    assert place(order_service, "busy", 1).status_code == 202
+    r = place(order_service, "busy", 1)
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_batch_is_retried_while_catalog_is_down(order_service, catalog, async_orders):
+    queue, writers, start = async_orders
+    catalog.failures = 1
+
+    place(order_service, "retry", 1)
+    start()
+    deadline = time.monotonic() + 5
+    while not statuses(order_service, "retry") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert statuses(order_service, "retry") == [(1, "created")]
+    assert len(catalog.lookups) == 2
+
+
+def test_sqlite_queue_claims_with_a_lease(order_service, tmp_path):
+    queue = order_service.SQLiteOrderQueue(str(tmp_path / "queue.db"), max_items=3, lease=60)
+    for product_id in (1, 2, 3):
+        queue.put({"username": "u", "product_id": product_id, "quantity": 1, "enqueued_at": time.time()})
+    with pytest.raises(order_service.QueueFull):
+        queue.put({"username": "u", "product_id": 4, "quantity": 1, "enqueued_at": time.time()})
+
+    batch = queue.get_batch(2, timeout=0)
+    assert [item["product_id"] for item in batch] == [1, 2]
+    assert [item["product_id"] for item in queue.get_batch(10, timeout=0)] == [3]  # 1 and 2 are claimed
+    assert queue.get_batch(10, timeout=0) == []
+
+    queue.release(batch[:1])
+    assert [item["product_id"] for item in queue.get_batch(10, timeout=0)] == [1]
+    queue.ack(batch)
+    assert len(queue) == 1  # 3 is claimed but not yet acked
+
+    queue.lease = 0  # an expired lease makes claimed items visible again
+    assert [item["product_id"] for item in queue.get_batch(10, timeout=0)] == [3]
+
+
+def test_writers_start_with_the_worker_when_the_queue_has_a_backlog(order_service, tmp_path):
+    """A restarted worker writes what the previous run left queued without waiting for a new order,
+    but importing the app (as alembic does) starts nothing."""
+    queue_file = tmp_path / "queue.db"
+    probe = (
+        "import runpy, app\n"
+        "imported = len(app.order_writers.threads)\n"
+        "runpy.run_path('gunicorn.conf.py')['post_worker_init'](None)\n"
+        "print(imported, len(app.order_writers.threads))\n"
+        "app.order_writers.stop(timeout=0)\n"
+    )
+    env = {**os.environ, "ORDER_QUEUE": f"sqlite:///{queue_file}", "DATABASE_URL": f"sqlite:///{tmp_path / 'orders.db'}",
+           "ORDER_WRITERS": "2", "CATALOG_PORT": "1"}
+    started = lambda: subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(order_service.__file__), env=env,
+                                     capture_output=True, text=True, check=True, timeout=60).stdout.split()[-2:]
+
+    assert started() == ["0", "0"]  # empty queue: nothing to do until an async order arrives
+    order_service.SQLiteOrderQueue(str(queue_file), max_items=10).put(
+        {"username": "u", "product_id": 1, "quantity": 1, "enqueued_at": time.time(), "tracking_id": "f" * 32})
+    assert started() == ["0", "2"]
+
+
+@pytest.mark.parametrize("queue", ["memory", "sqlite"])
+def test_queue_depth_gauge_needs_no_metrics_dir_at_import(order_service, tmp_path, queue):
+    """alembic's env.py imports the app before the entrypoint has created PROMETHEUS_MULTIPROC_DIR."""
+    env = {**os.environ, "ORDER_QUEUE": "memory" if queue == "memory" else f"sqlite:///{tmp_path / 'queue.db'}",
+           "DATABASE_URL": f"sqlite:///{tmp_path / 'orders.db'}", "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "missing")}
+    done = subprocess.run([sys.executable, "-c", "import app; app.ORDER_QUEUE_DEPTH.set(0)"],
+                          cwd=os.path.dirname(order_service.__file__), env=env, capture_output=True, text=True, timeout=60)
+    assert done.returncode == 0, done.stderr
+
+
+def test_gateway_tracks_orders_by_tracking_id(mock_upstream, auth_header):
+    seen = []
+
+    def order(req):
+        seen.append((req.url.path, req.headers["X-User"]))
+        return httpx.Response(200, json={"id": 1, "status": "created", "tracking_id": "a" * 32})
+
+    mock_upstream("order", order)
+    with TestClient(app) as client:
+        assert client.get(f"/orders/tracking/{'a' * 32}", headers=auth_header()).json()["status"] == "created"
+        assert client.get("/orders/tracking/not-an-id", headers=auth_header()).status_code == 422
+    assert seen == [(f"/order/tracking/{'a' * 32}", "bob")]
+
+
+def test_gateway_passes_202_through(mock_upstream, auth_header):
+    mock_upstream("order", lambda req: httpx.Response(202, json={"product_id": 1, "quantity": 1, "status": "pending"}))
+    with TestClient(app) as client:
+        r = client.post("/orders", json={"product_id": 1, "quantity": 1}, headers=auth_header())
+    assert r.status_code == 202
+    assert r.json()["status"] == "pending"
+
+
+def test_queue_full_503_does_not_open_the_order_circuit(mock_upstream, auth_header):
+    import main
+
+    mock_upstream("order", lambda req: httpx.Response(
+        503, json={"description": "Order queue is full, retry shortly"}, headers={"Retry-After": "1"}))
+    with TestClient(app) as client:
+        for i in range(main.order_client.config.circuit_failure_threshold + 2):
+            r = client.post("/orders", json={"product_id": 1, "quantity": 1}, headers=auth_header(username=f"u{i}"))
+            assert r.status_code == 503
+            assert r.headers["Retry-After"] == "1"  # the client is told when to come back
+    assert main.order_client.breaker.state == "closed"
@@ -0,0 +1,77 @@
+import httpx
+import requests
+from fastapi.testclient import TestClient
+
+from main import app
+from tracing import parse_server_timing
+
+
+def timings(response) -> dict:
+    return dict(parse_server_timing(response.headers["Server-Timing"]))
+
+
+def test_gateway_assigns_and_propagates_request_id(mock_upstream):
+    seen = []
+
+    def catalog(req):
+        seen.append(req.headers.get("X-Request-ID"))
+        return httpx.Response(200, json={"id": 1, "name": "Widget", "price": 2.0},
+                              headers={"Server-Timing": "handler;dur=12.5, db;dur=3.0;desc=\"2 calls\"",
+                                       "X-Request-ID": "not-forwarded"})
+
+    mock_upstream("catalog", catalog)
+    with TestClient(app) as client:
+        r = client.get("/products/lookup?ids=1")
+        generated = r.headers["X-Request-ID"]
+        assert seen == [generated]
+
+        r = client.get("/products/lookup?ids=2", headers={"X-Request-ID": "abc-123"})
+        assert r.headers["X-Request-ID"] == "abc-123" and seen[-1] == "abc-123"
+
+        r = client.get("/products/lookup?ids=3", headers={"X-Request-ID": "bad id!"})
+        assert r.headers["X-Request-ID"] not in ("", "bad id!")
+
+    spans = timings(r)
+    assert {"handler", "catalog", "catalog.handler", "catalog.db"} <= spans.keys()
+    assert spans["catalog.handler"] == 0.0125
+    assert r.headers.get_list("Server-Timing") == [r.headers["Server-Timing"]]  # upstream header not forwarded as-is
+
+
+def test_gateway_request_id_reaches_the_logs(caplog):
+    with TestClient(app) as client, caplog.at_level("INFO", logger="api-gateway"):
+        client.get("/health", headers={"X-Request-ID": "trace-me"})
+    assert {record.request_id for record in caplog.records if record.name == "api-gateway"} == {"trace-me"}
+
+
+def test_catalog_reports_handler_and_db_time(catalog_service):
+    client = catalog_service.app.test_client()
+    r = client.get("/catalog/1", headers={"X-Request-ID": "from-gateway"})
+    assert r.headers["X-Request-ID"] == "from-gateway"
+    assert {"handler", "db"} <= timings(r).keys()
+    assert len(client.get("/health").headers["X-Request-ID"]) == 32
+
+
+def test_order_forwards_request_id_to_catalog(order_service, monkeypatch):
+    sent = []
+
+    def catalog_send(adapter, request, **kwargs):
+        sent.append(request.headers.get("X-Request-ID"))
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Server-Timing"] = "handler;dur=4.0, db;dur=1.0"
+        return response
+
+    monkeypatch.setattr(requests.adapters.HTTPAdapter, "send", catalog_send)
+    order_service.product_cache.clear()
+    try:
+        r = order_service.app.test_client().post(
+            "/order", json={"product_id": 7, "quantity": 1},
+            headers={"X-User": "bob", "X-Request-ID": "order-trace"},
+        )
+    finally:
+        order_service.product_cache.clear()
+    assert r.status_code == 201, r.get_data(as_text=True)
+    assert sent == ["order-trace"]
+    spans = timings(r)
+    assert {"handler", "db", "commit", "catalog"} <= spans.keys()
+    assert spans["catalog.handler"] == 0.004 and spans["catalog.db"] == 0.001
@@ -0,0 +1,46 @@
+import httpx
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from main import app
+
+
+def test_gateway_labels_by_route_template(mock_upstream, auth_header):
+    mock_upstream("order", lambda req: httpx.Response(200, json={"id": 1}))
+
+    labels = {"method": "GET", "endpoint": "/orders/{order_id}", "http_status": "200"}
+    before = REGISTRY.get_sample_value("gateway_requests_total", labels) or 0
+
+    with TestClient(app) as client:
+        for order_id in (11, 12, 13):
+            assert client.get(f"/orders/{order_id}", headers=auth_header()).status_code == 200
+        assert client.get("/orders/14").status_code == 401
+
+        metrics = client.get("/metrics").text
+
+    assert 'endpoint="/orders/11"' not in metrics
+    assert REGISTRY.get_sample_value("gateway_requests_total", labels) == before + 3
+    assert 'gateway_requests_total{endpoint="/orders/{order_id}",http_status="401",method="GET"}' in metrics
+    assert 'gateway_request_duration_seconds_count{endpoint="/orders/{order_id}",method="GET"}' in metrics
+    assert 'gateway_upstream_request_duration_seconds_count{method="GET",status="200",upstream="order"}' in metrics
+
+
+def test_catalog_labels_by_url_rule(catalog_service):
+    client = catalog_service.app.test_client()
+    client.get("/catalog/987654")
+    client.get("/no/such/path")
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'catalog_requests_total{endpoint="/catalog/<int:product_id>",http_status="404",method="GET"}' in metrics
+    assert 'endpoint="<unmatched>"' in metrics
+    assert "/catalog/987654" not in metrics
+    assert 'catalog_request_duration_seconds_count{endpoint="/catalog/<int:product_id>",method="GET"}' in metrics
+
+
+def test_order_labels_by_url_rule(order_service):
+    client = order_service.app.test_client()
+    client.get("/order/424242")
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'order_requests_total{endpoint="/order/<int:order_idx>",http_status="404",method="GET"}' in metrics
+    assert 'order_request_duration_seconds_count{endpoint="/order/<int:order_idx>",method="GET"}' in metrics